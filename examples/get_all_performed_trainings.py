@@ -1,40 +1,27 @@
 import asyncio
-import json
-import pathlib
 
-from freeletics import AsyncFreeleticsClient, FreeleticsClient
+from freeletics import (
+    AsyncFreeleticsClient,
+    FreeleticsClient,
+    async_export_performed_activities,
+    export_performed_activities,
+)
 
 
 USERNAME = "INSERT YOUR USERNAME"
 PASSWORD = "INSERT YOUR PASSWORD"  # noqa: S105
-FILENAME = "INSERT TARGET JSON FILENAME"
+FILENAME = "INSERT TARGET JSONL FILENAME"  # use a .gz suffix to compress
 
 
 async def async_main():
     async with AsyncFreeleticsClient() as client:
         await client.login(USERNAME, PASSWORD)
 
-        # collecting activities_ids
-        aids = []
-        page = 1
-        while True:
-            r = await client.get_user_activities_by_id(page=page)
-            data = r["data"]
-            for i in data:
-                if i["type"] == "training_completed":
-                    aod = i["relationships"]["activity_object"]["data"]
-                    if aod["type"] == "training":
-                        aids.append(aod["id"])
-            if "next" not in r["links"]:
-                break
-            page += 1
-
-        # get activities from ids
-        jobs = (client.get_performed_activities_by_id(i) for i in aids)
-        activities = await asyncio.gather(*jobs)
-        file = pathlib.Path(FILENAME)
-        activities = json.dumps(activities, indent=4, default=lambda o: o.as_dict())
-        file.write_text(activities)
+        # every activity is written to the file as soon as it arrives
+        count = await async_export_performed_activities(
+            client, FILENAME, concurrency=10
+        )
+        print(f"Exported {count} activities")
 
         await client.logout()
 
@@ -43,30 +30,8 @@ def sync_main():
     with FreeleticsClient() as client:
         client.login(USERNAME, PASSWORD)
 
-        # collecting activities_ids
-        aids = []
-        page = 1
-        while True:
-            r = client.get_user_activities_by_id(page=page)
-            data = r["data"]
-            for i in data:
-                if i["type"] == "training_completed":
-                    aod = i["relationships"]["activity_object"]["data"]
-                    if aod["type"] == "training":
-                        aids.append(aod["id"])
-            if "next" not in r["links"]:
-                break
-            page += 1
-
-        # get activities from ids
-        activities = []
-        for aid in aids:
-            r = client.get_performed_activities_by_id(aid)
-            activities.append(r)
-
-        file = pathlib.Path(FILENAME)
-        activities = json.dumps(activities, indent=4, default=lambda o: o.as_dict())
-        file.write_text(activities)
+        count = export_performed_activities(client, FILENAME, concurrency=4)
+        print(f"Exported {count} activities")
 
         client.logout()
 
@@ -1,4 +1,53 @@
 """Inspired from http://topu.ch/it/reverse-engineering-des-freeletics-apis/."""
 
+from ._aggregates import ActivityAggregates  # noqa: F401
+from ._archive import ActivityArchive  # noqa: F401
+from ._cache import (  # noqa: F401
+    SLOWLY_CHANGING_ENDPOINTS,
+    BaseCache,
+    CachePolicy,
+    SQLiteCache,
+)
+from ._catalog import CoachCatalog  # noqa: F401
 from ._client import AsyncFreeleticsClient, FreeleticsClient  # noqa: F401
-from ._models import Credentials  # noqa: F401
+from ._columnar import (  # noqa: F401
+    DEFAULT_ACTIVITY_COLUMNS,
+    ActivityColumn,
+    activities_to_arrow,
+    activities_to_numpy,
+    read_activities_npz,
+    write_activities_npz,
+    write_activities_parquet,
+)
+from ._credential_store import SharedCredentialStore  # noqa: F401
+from ._export import (  # noqa: F401
+    NDJSONWriter,
+    async_export_performed_activities,
+    export_performed_activities,
+    read_ndjson,
+)
+from ._json import get_json_backend, set_json_backend  # noqa: F401
+from ._jsonapi import IdentityMap, Resource  # noqa: F401
+from ._models import Credentials, FetchResult, RawResponse  # noqa: F401
+from ._payment import PaymentTokenManager  # noqa: F401
+from ._ratelimit import AdaptiveRateLimiter  # noqa: F401
+from ._retry import RetryPolicy, RetryStats  # noqa: F401
+from ._stats import (  # noqa: F401
+    completion_streaks,
+    personal_bests,
+    rolling_average,
+    time_per_round,
+    time_per_round_trend,
+    weekly_volume,
+)
+from ._store import ActivityStore  # noqa: F401
+from ._sync import ActivitySync, AsyncActivitySync, SyncState  # noqa: F401
+from ._typed import (  # noqa: F401
+    CalendarDay,
+    CoachExercise,
+    CoachWorkout,
+    PerformedActivity,
+    PlannedActivity,
+    TypedModel,
+    UserProfile,
+)
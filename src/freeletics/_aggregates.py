@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Union
+
+from ._columnar import DEFAULT_ACTIVITY_COLUMNS
+from ._models import BaseResponseModel
+
+
+_COLUMNS = {c.name: c for c in DEFAULT_ACTIVITY_COLUMNS}
+
+
+def _week_key(timestamp: Optional[int]) -> Optional[str]:
+    """Return the monday (ISO format) of the week of a timestamp."""
+    if timestamp is None:
+        return None
+    day = datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def _empty_totals() -> Dict[str, float]:
+    return {"count": 0, "duration": 0.0, "points": 0.0}
+
+
+class ActivityAggregates:
+    """Aggregates which are updated with every new performed activity.
+
+    Adding an activity costs O(1), reading an aggregate is a dict lookup.
+    The caller must ensure that an activity is only added once, e.g. by
+    using `ActivitySync` with a `SyncState` which holds the aggregates.
+    """
+
+    def __init__(
+        self,
+        total: Optional[Dict[str, float]] = None,
+        weeks: Optional[Dict[str, Dict[str, float]]] = None,
+        workouts: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        self._total = total or _empty_totals()
+        self._weeks = weeks or {}
+        self._workouts = workouts or {}
+
+    def add(self, activity: Union[BaseResponseModel, Dict[str, Any]]) -> None:
+        if isinstance(activity, BaseResponseModel):
+            activity = activity.as_dict()
+        values = {name: column.extract(activity) for name, column in _COLUMNS.items()}
+        duration = values["duration"] or 0.0
+        points = values["points"] or 0.0
+
+        totals = [self._total]
+        week = _week_key(values["completed_at"])
+        if week is not None:
+            totals.append(self._weeks.setdefault(week, _empty_totals()))
+        for item in totals:
+            item["count"] += 1
+            item["duration"] += duration
+            item["points"] += points
+
+        if values["workout_slug"]:
+            self._add_workout(values)
+
+    def _add_workout(self, values: Dict[str, Any]) -> None:
+        workout = self._workouts.setdefault(
+            values["workout_slug"],
+            {
+                "count": 0,
+                "best_duration": None,
+                "best_duration_id": None,
+                "best_points": None,
+                "last_completed_at": None,
+            },
+        )
+        workout["count"] += 1
+
+        duration = values["duration"]
+        if duration is not None and (
+            workout["best_duration"] is None or duration < workout["best_duration"]
+        ):
+            workout["best_duration"] = duration
+            workout["best_duration_id"] = values["id"]
+
+        points = values["points"]
+        if points is not None and (
+            workout["best_points"] is None or points > workout["best_points"]
+        ):
+            workout["best_points"] = points
+
+        completed_at = values["completed_at"]
+        if completed_at is not None and (
+            workout["last_completed_at"] is None
+            or completed_at > workout["last_completed_at"]
+        ):
+            workout["last_completed_at"] = completed_at
+
+    @property
+    def total(self) -> Dict[str, float]:
+        return self._total
+
+    def week(self, day: Union[date, str]) -> Dict[str, float]:
+        """Totals of the week which contains `day` (date or ISO string)."""
+        if isinstance(day, str):
+            day = date.fromisoformat(day[:10])
+        elif isinstance(day, datetime):
+            day = day.date()
+        monday = day - timedelta(days=day.weekday())
+        return self._weeks.get(monday.isoformat(), _empty_totals())
+
+    @property
+    def weeks(self) -> Dict[str, Dict[str, float]]:
+        return self._weeks
+
+    def workout(self, slug: str) -> Optional[Dict[str, Any]]:
+        return self._workouts.get(slug)
+
+    @property
+    def workouts(self) -> Dict[str, Dict[str, Any]]:
+        return self._workouts
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ActivityAggregates":
+        return cls(total=data["total"], weeks=data["weeks"], workouts=data["workouts"])
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self._total,
+            "weeks": self._weeks,
+            "workouts": self._workouts,
+        }
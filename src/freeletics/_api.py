@@ -83,7 +83,7 @@ class ApiRequestBuilder:
     def get_calendar_by_date(
         self,
         date: str,
-        payment_token: str,
+        payment_token: Optional[str],
         distance_unit_system: str = "metric",
         weight_unit_system: str = "metric",
         skill_paths_enabled: str = "true",
@@ -94,7 +94,7 @@ class ApiRequestBuilder:
             date format: 2021-08-17.
         """
         url = "/v7/calendar/days/" + date
-        headers = {"Payment-Token": payment_token}
+        headers = None if payment_token is None else {"Payment-Token": payment_token}
         params = {
             "distance_unit_system": distance_unit_system,
             "skill_paths_enabled": skill_paths_enabled,
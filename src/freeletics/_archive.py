@@ -0,0 +1,277 @@
+import logging
+import mmap
+import os
+import pathlib
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from . import _json
+from ._models import BaseResponseModel, FetchResult, RawResponse
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FLAI"
+VERSION = 1
+# records are compressed as zlib streams, not as gzip members
+COMPRESSIONS = ("zlib", "zstd", "none")
+
+# magic, version, compression, capacity, count
+HEADER = struct.Struct("<4sBB2xQQ")
+# activity id, offset in the data file, length of the compressed record
+SLOT = struct.Struct("<qQI4x")
+
+INITIAL_CAPACITY = 1024
+MAX_LOAD = 0.5
+_FIBONACCI = 0x9E3779B97F4A7C15
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise Exception(
+            "zstandard is required, please install it with pip install zstandard"
+        )
+
+
+def _compressor(compression: str):
+    if compression == "zlib":
+        return zlib.compress, zlib.decompress
+    if compression == "zstd":
+        _require_zstandard()
+        return (
+            zstandard.ZstdCompressor().compress,
+            zstandard.ZstdDecompressor().decompress,
+        )
+    return bytes, bytes
+
+
+Record = Union[bytes, RawResponse, BaseResponseModel, Dict[str, Any]]
+
+
+def _raw_content(data: Record) -> bytes:
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, RawResponse):
+        if data.content is None:
+            raise ValueError("The body of a streamed response cannot be archived")
+        return data.content
+    if isinstance(data, BaseResponseModel) and not data.is_decoded:
+        content = data.response.content
+        if content:
+            return content
+    if isinstance(data, BaseResponseModel):
+        data = data.as_dict()
+    return _json.dumps(data).encode("utf-8")
+
+
+class _OffsetIndex:
+    """Fixed-width hash table (open addressing) in a memory-mapped file."""
+
+    def __init__(self, filename: pathlib.Path, writable: bool) -> None:
+        self._filename = filename
+        self._writable = writable
+        self._fp = open(filename, "r+b" if writable else "rb")
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self._mmap = mmap.mmap(self._fp.fileno(), 0, access=access)
+        magic, version, compression, capacity, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f"{filename} is not a valid archive index")
+        self.compression = COMPRESSIONS[compression]
+        self.capacity = capacity
+        self.count = count
+        self._shift = 64 - (capacity.bit_length() - 1)
+
+    @classmethod
+    def create(
+        cls, filename: pathlib.Path, compression: str, capacity: int
+    ) -> "_OffsetIndex":
+        compression_id = COMPRESSIONS.index(compression)
+        with open(filename, "wb") as fp:
+            fp.write(HEADER.pack(MAGIC, VERSION, compression_id, capacity, 0))
+            fp.truncate(HEADER.size + capacity * SLOT.size)
+        return cls(filename, writable=True)
+
+    def _slot(self, key: int) -> Iterator[int]:
+        mask = self.capacity - 1
+        position = ((key * _FIBONACCI) & _MASK64) >> self._shift
+        while True:
+            yield HEADER.size + position * SLOT.size
+            position = (position + 1) & mask
+
+    def lookup(self, key: int) -> Optional[Tuple[int, int]]:
+        for slot in self._slot(key):
+            slot_key, offset, length = SLOT.unpack_from(self._mmap, slot)
+            if length == 0:
+                return None
+            if slot_key == key:
+                return offset, length
+
+    def insert(self, key: int, offset: int, length: int) -> bool:
+        """Insert or replace an entry, returns `True` if the key is new."""
+        for slot in self._slot(key):
+            slot_key, _, slot_length = SLOT.unpack_from(self._mmap, slot)
+            if slot_length == 0 or slot_key == key:
+                SLOT.pack_into(self._mmap, slot, key, offset, length)
+                if slot_length == 0:
+                    self.count += 1
+                    HEADER.pack_into(
+                        self._mmap,
+                        0,
+                        MAGIC,
+                        VERSION,
+                        COMPRESSIONS.index(self.compression),
+                        self.capacity,
+                        self.count,
+                    )
+                return slot_length == 0
+
+    def entries(self) -> Iterator[Tuple[int, int, int]]:
+        for position in range(self.capacity):
+            key, offset, length = SLOT.unpack_from(
+                self._mmap, HEADER.size + position * SLOT.size
+            )
+            if length:
+                yield key, offset, length
+
+    def flush(self) -> None:
+        if self._writable:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._mmap.close()
+        self._fp.close()
+
+
+class ActivityArchive:
+    """Append-only archive of compressed activity records.
+
+    Every record is compressed on its own and appended to the data file.
+    The index file `<filename>.idx` is a memory-mapped hash table, which
+    maps an activity id to the position of its record, so a record is
+    read with one lookup and one read. Adding an existing id appends a new
+    record and points the index to it.
+    """
+
+    def __init__(
+        self,
+        filename: Union[str, pathlib.Path],
+        mode: str = "r",
+        compression: str = "zlib",
+    ) -> None:
+        if mode not in ("r", "a"):
+            raise Exception("mode must be 'r' or 'a'")
+        if compression not in COMPRESSIONS:
+            raise Exception(f"compression must be one of {', '.join(COMPRESSIONS)}")
+
+        self._file = pathlib.Path(filename)
+        self._index_file = self._file.with_name(f"{self._file.name}.idx")
+        self._writable = mode == "a"
+        self._lock = threading.Lock()
+
+        if self._writable and not self._index_file.exists():
+            self._file.touch()
+            self._index = _OffsetIndex.create(
+                self._index_file, compression, INITIAL_CAPACITY
+            )
+        else:
+            self._index = _OffsetIndex(self._index_file, self._writable)
+        self._compress, self._decompress = _compressor(self._index.compression)
+        self._fp = open(self._file, "r+b" if self._writable else "rb")
+
+    def __enter__(self) -> "ActivityArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._index.count
+
+    def __contains__(self, activity_id: Union[str, int]) -> bool:
+        return self._index.lookup(int(activity_id)) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return (key for key, _, _ in self._index.entries())
+
+    @property
+    def compression(self) -> str:
+        return self._index.compression
+
+    def _grow(self) -> None:
+        capacity = self._index.capacity * 2
+        tmp_file = self._index_file.with_name(f"{self._index_file.name}.tmp")
+        new_index = _OffsetIndex.create(tmp_file, self.compression, capacity)
+        for entry in self._index.entries():
+            new_index.insert(*entry)
+        new_index.close()
+        self._index.close()
+        os.replace(tmp_file, self._index_file)
+        self._index = _OffsetIndex(self._index_file, writable=True)
+        logger.debug("Grew archive index to %s slots", capacity)
+
+    def add(self, activity_id: Union[str, int], data: Record) -> None:
+        """Append a record, raw response bytes are stored without decoding."""
+        if not self._writable:
+            raise Exception("Archive is opened read-only")
+        content = _raw_content(data)
+        # a length of 0 marks an empty slot in the index
+        if not content:
+            raise ValueError("An empty record cannot be archived")
+        record = self._compress(content)
+        with self._lock:
+            if self._index.count + 1 > self._index.capacity * MAX_LOAD:
+                self._grow()
+            offset = self._fp.seek(0, os.SEEK_END)
+            self._fp.write(record)
+            self._index.insert(int(activity_id), offset, len(record))
+
+    def add_results(self, results: Iterable[FetchResult]) -> int:
+        """Add the successful results of `fetch_many`, returns their number."""
+        count = 0
+        for result in results:
+            error = result.error
+            if result.ok:
+                try:
+                    self.add(result.key, result.response)
+                    count += 1
+                    continue
+                except ValueError as exc:
+                    error = exc
+            logger.warning("Skip activity %s: %s", result.key, error)
+        return count
+
+    def get_raw(self, activity_id: Union[str, int]) -> Optional[bytes]:
+        with self._lock:
+            entry = self._index.lookup(int(activity_id))
+            if entry is None:
+                return None
+            offset, length = entry
+            self._fp.seek(offset)
+            record = self._fp.read(length)
+        return self._decompress(record)
+
+    def get(self, activity_id: Union[str, int]) -> Optional[Dict[str, Any]]:
+        content = self.get_raw(activity_id)
+        return None if content is None else _json.loads(content)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._writable:
+                self._fp.flush()
+                self._index.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._fp.closed:
+                self._fp.close()
+                self._index.close()
@@ -6,11 +6,16 @@ from typing import AsyncGenerator, Generator, Optional, Union
 import httpx
 
 from ._api import ApiRequestBuilder
-from ._models import IdToken, RefreshToken
+from ._credential_store import SharedCredentialStore
+from ._models import Credentials, IdToken, RefreshToken
+from ._retry import RetryPolicy
 
 
 logger = logging.getLogger(__name__)
 
+# the background refresh pauses at least this long after every attempt
+MIN_REFRESH_INTERVAL = 1.0
+
 
 class FreeleticsAuth(httpx.Auth):
     def __init__(
@@ -19,13 +24,29 @@ class FreeleticsAuth(httpx.Auth):
         refresh_token: Optional[RefreshToken],
         session: Union[httpx.Client, httpx.AsyncClient],
         api_request_builder: ApiRequestBuilder,
+        retry_policy: Optional[RetryPolicy] = None,
+        background_refresh: bool = False,
+        refresh_margin: float = 300,
+        credential_store: Optional[SharedCredentialStore] = None,
     ) -> None:
         self._id_token = id_token
+        # lifetime of the last id_token set after construction, the lifetime
+        # of the initial id_token is unknown
+        self._id_token_lifetime: Optional[float] = None
         self._refresh_token = refresh_token
         self._session = session
         self._api_request_builder = api_request_builder
+        if retry_policy is not None and not retry_policy.retry_token_refresh:
+            retry_policy = None
+        self._retry_policy = retry_policy
         self._sync_lock = threading.RLock()
         self._async_lock = asyncio.Lock()
+        self._background_refresh = background_refresh
+        self._refresh_margin = refresh_margin
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._stop_refresh = threading.Event()
+        self._credential_store = credential_store
 
     @property
     def id_token(self) -> Optional[IdToken]:
@@ -39,6 +60,7 @@ class FreeleticsAuth(httpx.Auth):
         ):
             raise Exception("user_id for id_token and refresh_token are not " "equal")
         self._id_token = id_token
+        self._id_token_lifetime = id_token.expires_in_seconds
 
     @property
     def refresh_token(self) -> Optional[RefreshToken]:
@@ -55,7 +77,7 @@ class FreeleticsAuth(httpx.Auth):
         self._refresh_token = refresh_token
 
     def _set_auth_header(self, request) -> None:
-        request.headers["Authorization"] = "Bearer " + self.id_token.token
+        request.headers["Authorization"] = "Bearer " + self._id_token.token
 
     def _set_token_from_response(self, response: httpx.Response) -> None:
         if response.status_code != httpx.codes.CREATED:
@@ -77,12 +99,40 @@ class FreeleticsAuth(httpx.Auth):
             refresh_token=self.refresh_token.token, user_id=self.refresh_token.user_id
         )
 
+    def _needs_refresh(self, margin: float = 20) -> bool:
+        id_token = self._id_token
+        return id_token is None or id_token.expires_in_seconds < margin
+
+    def _current_refresh_margin(self) -> float:
+        # a margin as long as the lifetime of new id_tokens would refresh
+        # them again right away
+        if self._id_token_lifetime is None:
+            return self._refresh_margin
+        return min(self._refresh_margin, self._id_token_lifetime / 2)
+
+    def _seconds_until_refresh(self) -> float:
+        id_token = self._id_token
+        if id_token is None:
+            return 0
+        return id_token.expires_in_seconds - self._current_refresh_margin()
+
+    def _refresh_pause(self, failed: bool) -> float:
+        if failed:
+            return max(self._refresh_margin / 10, MIN_REFRESH_INTERVAL)
+        return MIN_REFRESH_INTERVAL
+
     def sync_auth_flow(self, request) -> Generator[httpx.Request, httpx.Response, None]:
-        with self._sync_lock:
-            if self.id_token is None or self.id_token.expires_in_seconds < 20:
-                if self.refresh_token is None:
-                    raise Exception("id_token and refresh_token not set")
-                self.sync_update_id_token()
+        # the lock is only taken, if the token must be refreshed, a second
+        # check inside the lock ensures only one refresh is in flight
+        if self._needs_refresh():
+            with self._sync_lock:
+                if self._needs_refresh():
+                    if self.refresh_token is None:
+                        raise Exception("id_token and refresh_token not set")
+                    self.sync_update_id_token()
+
+        if self._background_refresh and self._refresh_thread is None:
+            self._start_sync_refresher()
 
         self._set_auth_header(request)
         yield request
@@ -90,31 +140,162 @@ class FreeleticsAuth(httpx.Auth):
     async def async_auth_flow(
         self, request
     ) -> AsyncGenerator[httpx.Request, httpx.Response]:
-        async with self._async_lock:
-            if self.id_token is None or self.id_token.expires_in_seconds < 20:
-                if self.refresh_token is None:
-                    raise Exception("id_token and refresh_token not set")
-                await self.async_update_id_token()
+        if self._needs_refresh():
+            async with self._async_lock:
+                if self._needs_refresh():
+                    if self.refresh_token is None:
+                        raise Exception("id_token and refresh_token not set")
+                    await self.async_update_id_token()
+
+        if self._background_refresh and (
+            self._refresh_task is None or self._refresh_task.done()
+        ):
+            self._start_async_refresher()
 
         self._set_auth_header(request)
         yield request
 
+    def _start_sync_refresher(self) -> None:
+        if self.refresh_token is None:
+            return
+
+        with self._sync_lock:
+            if self._refresh_thread is not None:
+                return
+            self._stop_refresh.clear()
+            self._refresh_thread = threading.Thread(
+                target=self._sync_refresh_loop, name="id-token-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _sync_refresh_loop(self) -> None:
+        while not self._stop_refresh.is_set() and self.refresh_token is not None:
+            delay = self._seconds_until_refresh()
+            if delay > 0:
+                self._stop_refresh.wait(delay)
+                continue
+
+            failed = False
+            try:
+                with self._sync_lock:
+                    if self._needs_refresh(self._current_refresh_margin()):
+                        self.sync_update_id_token()
+            except Exception:
+                logger.exception("Background refresh of id_token failed")
+                failed = True
+            self._stop_refresh.wait(self._refresh_pause(failed))
+
+    def _start_async_refresher(self) -> None:
+        if self.refresh_token is None:
+            return
+
+        self._refresh_task = asyncio.get_running_loop().create_task(
+            self._async_refresh_loop()
+        )
+
+    async def _async_refresh_loop(self) -> None:
+        while self.refresh_token is not None:
+            delay = self._seconds_until_refresh()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            failed = False
+            try:
+                async with self._async_lock:
+                    if self._needs_refresh(self._current_refresh_margin()):
+                        await self.async_update_id_token()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Background refresh of id_token failed")
+                failed = True
+            await asyncio.sleep(self._refresh_pause(failed))
+
+    def stop_background_refresh(self) -> None:
+        self._stop_refresh.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+
+    async def async_stop_background_refresh(self) -> None:
+        task = self._refresh_task
+        self.stop_background_refresh()
+        if task is not None:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    @property
+    def credential_store(self) -> Optional[SharedCredentialStore]:
+        return self._credential_store
+
+    def get_credentials(self) -> Credentials:
+        return Credentials(
+            id_token=self.id_token.token,
+            refresh_token=self.refresh_token.token,
+            user_id=self.refresh_token.user_id,
+        )
+
+    def _adopt_stored_id_token(self) -> bool:
+        id_token = self._credential_store.newer_id_token(self._id_token)
+        if id_token is None:
+            return False
+        self.id_token = id_token
+        logger.info("use id_token from credential store")
+        return True
+
     def sync_update_id_token(self) -> None:
+        if self._credential_store is None:
+            self._sync_request_id_token()
+            return
+
+        # only one process refreshes the token, the others use the new token
+        with self._credential_store.locked():
+            if not self._adopt_stored_id_token():
+                self._sync_request_id_token()
+                self._credential_store.save(self.get_credentials(), locked=True)
+
+    async def async_update_id_token(self) -> None:
+        if self._credential_store is None:
+            await self._async_request_id_token()
+            return
+
+        async with self._credential_store.async_locked():
+            if not self._adopt_stored_id_token():
+                await self._async_request_id_token()
+                self._credential_store.save(self.get_credentials(), locked=True)
+
+    def _sync_request_id_token(self) -> None:
         logger.info("Requesting new id_token")
 
         if not isinstance(self._session, httpx.Client):
             raise Exception("Client is not an Client")
 
         request = self._build_update_id_token_request()
-        response = self._session.send(request, auth=None)
+        if self._retry_policy is None:
+            response = self._session.send(request, auth=None)
+        else:
+            response = self._retry_policy.send(
+                self._session.send, request, force=True, auth=None
+            )
         self._set_token_from_response(response)
 
-    async def async_update_id_token(self) -> None:
+    async def _async_request_id_token(self) -> None:
         logger.info("Requesting new id_token")
 
         if not isinstance(self._session, httpx.AsyncClient):
             raise Exception("Client is not an AsyncClient")
 
         request = self._build_update_id_token_request()
-        response = await self._session.send(request, auth=None)
+        if self._retry_policy is None:
+            response = await self._session.send(request, auth=None)
+        else:
+            response = await self._retry_policy.async_send(
+                self._session.send, request, force=True, auth=None
+            )
         self._set_token_from_response(response)
@@ -0,0 +1,286 @@
+import fnmatch
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import httpx
+
+
+VARY_HEADERS = ("Accept", "Payment-Token")
+# these headers describe the transfer of the original body and must not be
+# replayed together with the already decoded content
+SKIP_HEADERS = ("Content-Encoding", "Content-Length", "Transfer-Encoding")
+
+
+def build_cache_key(
+    request: httpx.Request,
+    namespace: Optional[Union[str, int]] = None,
+    vary: Sequence[str] = VARY_HEADERS,
+) -> str:
+    """Build a cache key for a request.
+
+    The key contains the namespace (normally the user id), the method, the
+    full url with query params and the `vary` headers which can change the
+    response.
+    """
+    headers = ";".join(
+        f"{name.lower()}={request.headers[name]}"
+        for name in vary
+        if name in request.headers
+    )
+    return f"{namespace or ''}|{request.method}|{request.url}|{headers}"
+
+
+class CacheEntry:
+    def __init__(
+        self,
+        etag: Optional[str],
+        status_code: int,
+        headers: Dict[str, str],
+        content: bytes,
+        stored_at: Optional[float] = None,
+    ) -> None:
+        self.etag = etag
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.stored_at = stored_at or time.time()
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "CacheEntry":
+        headers = {
+            k: v for k, v in response.headers.items() if k.title() not in SKIP_HEADERS
+        }
+        return cls(
+            etag=response.headers.get("ETag"),
+            status_code=response.status_code,
+            headers=headers,
+            content=response.content,
+        )
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            status_code=self.status_code,
+            headers=self.headers,
+            content=self.content,
+            request=request,
+        )
+
+
+class CachePolicy:
+    """Freshness rules for the cached responses of an endpoint.
+
+    A cached response younger than `max_age` seconds is used without a
+    request. Up to `stale_while_revalidate` seconds later, it is still
+    returned at once, while it is revalidated in the background.
+    `vary` are the request headers which are part of the cache key.
+    """
+
+    def __init__(
+        self,
+        max_age: float = 0,
+        stale_while_revalidate: float = 0,
+        vary: Sequence[str] = VARY_HEADERS,
+    ) -> None:
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.vary = tuple(vary)
+
+    def is_fresh(self, entry: CacheEntry, now: Optional[float] = None) -> bool:
+        return (now or time.time()) - entry.stored_at <= self.max_age
+
+    def is_usable(self, entry: CacheEntry, now: Optional[float] = None) -> bool:
+        age = (now or time.time()) - entry.stored_at
+        return age <= self.max_age + self.stale_while_revalidate
+
+    def __repr__(self) -> str:
+        return (
+            f"CachePolicy(max_age={self.max_age}, "
+            f"stale_while_revalidate={self.stale_while_revalidate}, "
+            f"vary={self.vary})"
+        )
+
+
+# for responses which never change, e.g. past calendar days, the key does not
+# contain the payment token, so a new token does not refetch them
+PERMANENT_CACHE_POLICY = CachePolicy(max_age=float("inf"), vary=("Accept",))
+
+# endpoints which change rarely, e.g. to build cache policies:
+# {path: CachePolicy(3600, 86400) for path in SLOWLY_CHANGING_ENDPOINTS}
+SLOWLY_CHANGING_ENDPOINTS = (
+    "/v5/coach/exercises",
+    "/v5/coach/workouts",
+    "/messaging/v1/profile",
+    "/user/v1/status/general/",
+)
+
+
+def find_cache_policy(
+    policies: Dict[str, CachePolicy], request: httpx.Request
+) -> Optional[CachePolicy]:
+    """Return the policy of the first path pattern which matches the request.
+
+    Patterns are matched against the url path with `fnmatch`.
+    """
+    if request.method != "GET":
+        return None
+    path = request.url.path
+    for pattern, policy in policies.items():
+        if fnmatch.fnmatchcase(path, pattern):
+            return policy
+    return None
+
+
+class BaseCache:
+    """Interface for a response cache used by the clients."""
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    def touch(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def lookup(
+        self,
+        request: httpx.Request,
+        policy: CachePolicy,
+        namespace: Optional[Union[str, int]] = None,
+    ) -> Tuple[Optional[httpx.Response], bool]:
+        """Serve a request from cache according to a cache policy.
+
+        Returns the cached response (or `None`) and whether it is stale and
+        should be revalidated.
+        """
+        entry = self.get(build_cache_key(request, namespace, policy.vary))
+        if entry is None:
+            return None, False
+        now = time.time()
+        if policy.is_fresh(entry, now):
+            return entry.to_response(request), False
+        if policy.is_usable(entry, now):
+            return entry.to_response(request), True
+        return None, False
+
+    def prepare_request(
+        self,
+        request: httpx.Request,
+        namespace: Optional[Union[str, int]] = None,
+        vary: Sequence[str] = VARY_HEADERS,
+    ) -> Optional[CacheEntry]:
+        """Add an `If-None-Match` header to a GET request if possible.
+
+        Returns the cache entry, if the header was set.
+        """
+        if request.method != "GET" or "If-None-Match" in request.headers:
+            return None
+
+        entry = self.get(build_cache_key(request, namespace, vary))
+        if entry is None or entry.etag is None:
+            return None
+
+        request.headers["If-None-Match"] = entry.etag
+        return entry
+
+    def process_response(
+        self,
+        response: httpx.Response,
+        entry: Optional[CacheEntry],
+        namespace: Optional[Union[str, int]] = None,
+        vary: Sequence[str] = VARY_HEADERS,
+    ) -> httpx.Response:
+        """Store a fresh response or serve a 304 response from cache."""
+        request = response.request
+        if request.method != "GET":
+            return response
+
+        key = build_cache_key(request, namespace, vary)
+        if response.status_code == 304 and entry is not None:
+            self.touch(key)
+            return entry.to_response(request)
+
+        if response.status_code == 200 and "ETag" in response.headers:
+            self.put(key, CacheEntry.from_response(response))
+
+        return response
+
+
+class SQLiteCache(BaseCache):
+    """Persistent response cache stored in a SQLite database."""
+
+    def __init__(self, filename: Union[str, pathlib.Path]) -> None:
+        self._filename = filename
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(filename), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, etag TEXT, status_code INTEGER, "
+                "headers TEXT, content BLOB, stored_at REAL)"
+            )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, status_code, headers, content, stored_at "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        etag, status_code, headers, content, stored_at = row
+        return CacheEntry(
+            etag=etag,
+            status_code=status_code,
+            headers=json.loads(headers),
+            content=content,
+            stored_at=stored_at,
+        )
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    entry.etag,
+                    entry.status_code,
+                    json.dumps(entry.headers),
+                    entry.content,
+                    entry.stored_at,
+                ),
+            )
+
+    def touch(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,239 @@
+import json
+import logging
+import pathlib
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import httpx
+
+from . import _json
+from ._models import RawResponse, write_text_atomic
+
+
+logger = logging.getLogger(__name__)
+
+# source name, item kind and workout type of the coach catalogs
+SOURCES = (
+    ("exercises", "exercise", None),
+    ("workouts_god", "workout", "god"),
+    ("workouts_exercise", "workout", "exercise_workout"),
+    ("workouts_run", "workout", "run"),
+    ("workouts_cooldown", "workout", "cooldown"),
+    ("workouts_warmup", "workout", "warmup"),
+)
+ITEM_LIST_KEYS = ("exercises", "workouts", "data")
+TEXT_FIELDS = ("slug", "title", "name", "description")
+ATTRIBUTE_FIELDS = (
+    "body_region",
+    "body_regions",
+    "equipment",
+    "category_slug",
+    "duration",
+    "difficulty",
+)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def extract_items(data: Any) -> List[Dict[str, Any]]:
+    """Return the item list of a coach catalog response."""
+    if isinstance(data, list):
+        return data
+    for key in ITEM_LIST_KEYS:
+        if isinstance(data, Mapping) and isinstance(data.get(key), list):
+            return data[key]
+    return []
+
+
+def _attribute_values(value: Any) -> Iterable[Any]:
+    values = value if isinstance(value, list) else [value]
+    for v in values:
+        if isinstance(v, Mapping):
+            v = v.get("slug", v.get("name"))
+        if isinstance(v, str):
+            v = v.lower()
+        if v is not None:
+            yield v
+
+
+def _source_request(client, type_: Optional[str]) -> httpx.Request:
+    builder = client._api_request_builder
+    if type_ is None:
+        return builder.get_coach_exercises()
+    return builder.get_coach_workouts(type_=type_)
+
+
+class _SourceIndex:
+    """Lookup tables and inverted index of the items of one source."""
+
+    def __init__(self, kind: str, items: List[Dict[str, Any]]) -> None:
+        self.kind = kind
+        self.items = items
+        self.by_id: Dict[Any, Dict[str, Any]] = {}
+        self.by_slug: Dict[str, Dict[str, Any]] = {}
+        self.words: Dict[str, Set[int]] = {}
+        self.attributes: Dict[Tuple[str, Any], Set[int]] = {}
+        for position, item in enumerate(items):
+            self._index_item(position, item)
+
+    def _index_item(self, position: int, item: Dict[str, Any]) -> None:
+        if item.get("id") is not None:
+            self.by_id[item["id"]] = item
+        if item.get("slug") is not None:
+            self.by_slug[item["slug"]] = item
+
+        for field in TEXT_FIELDS:
+            if isinstance(item.get(field), str):
+                for word in tokenize(item[field]):
+                    self.words.setdefault(word, set()).add(position)
+        for field in ATTRIBUTE_FIELDS:
+            if field in item:
+                for value in _attribute_values(item[field]):
+                    self.attributes.setdefault((field, value), set()).add(position)
+
+    def search(
+        self, words: List[str], attributes: List[Tuple[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        sets = [self.words.get(word, set()) for word in words]
+        sets += [self.attributes.get(attribute, set()) for attribute in attributes]
+        if not sets:
+            return list(self.items)
+
+        sets.sort(key=len)
+        positions = set(sets[0])
+        for other in sets[1:]:
+            positions &= other
+            if not positions:
+                break
+        return [self.items[p] for p in sorted(positions)]
+
+
+class CoachCatalog:
+    """Local index of the coach exercises and workouts.
+
+    Every source (e.g. the god workouts) is stored with the ETag of its
+    response and indexed on its own, so a changed source is re-indexed
+    alone. `update` sends the stored ETags with `If-None-Match`, unchanged
+    sources are answered with `304 Not Modified` without a body. Items are
+    found by id or slug with a dict lookup, `search` intersects the sets of
+    an inverted index of words and attribute values.
+    """
+
+    def __init__(self, sources: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self._sources: Dict[str, Dict[str, Any]] = dict(sources or {})
+        self._indexes: Dict[str, _SourceIndex] = {
+            name: _SourceIndex(source["kind"], source["items"])
+            for name, source in self._sources.items()
+        }
+
+    def __len__(self) -> int:
+        return sum(len(index.items) for index in self._indexes.values())
+
+    @property
+    def versions(self) -> Dict[str, Optional[str]]:
+        return {name: source["etag"] for name, source in self._sources.items()}
+
+    def update_source(
+        self, name: str, kind: str, data: Any, etag: Optional[str] = None
+    ) -> bool:
+        """Replace the items of a source, returns `True` if it changed."""
+        source = self._sources.get(name)
+        if source is not None and etag is not None and source["etag"] == etag:
+            return False
+        items = extract_items(data)
+        self._sources[name] = {"kind": kind, "etag": etag, "items": items}
+        self._indexes[name] = _SourceIndex(kind, items)
+        logger.debug("Indexed coach catalog %s (%s)", name, etag)
+        return True
+
+    def _build_request(self, client, name: str, type_: Optional[str]) -> httpx.Request:
+        request = _source_request(client, type_)
+        source = self._sources.get(name)
+        if source is not None and source["etag"] is not None:
+            request.headers["If-None-Match"] = source["etag"]
+        return request
+
+    def _apply_response(self, name: str, kind: str, r: RawResponse) -> bool:
+        if r.status_code == 304:
+            logger.debug("Coach catalog %s not modified", name)
+            return False
+        return self.update_source(name, kind, _json.loads(r.content), r.etag)
+
+    def update(self, client) -> bool:
+        """Fetch all changed coach catalogs, returns `True` if any changed."""
+        changed = False
+        for name, kind, type_ in SOURCES:
+            r = client.send_raw(self._build_request(client, name, type_))
+            changed |= self._apply_response(name, kind, r)
+        return changed
+
+    async def async_update(self, client) -> bool:
+        changed = False
+        for name, kind, type_ in SOURCES:
+            r = await client.send_raw(self._build_request(client, name, type_))
+            changed |= self._apply_response(name, kind, r)
+        return changed
+
+    def get_exercise(self, key: Union[int, str]) -> Optional[Dict[str, Any]]:
+        """Find an exercise by id or slug."""
+        return self._lookup("exercise", key)
+
+    def get_workout(self, key: Union[int, str]) -> Optional[Dict[str, Any]]:
+        """Find a workout by id or slug."""
+        return self._lookup("workout", key)
+
+    def _lookup(self, kind: str, key: Union[int, str]) -> Optional[Dict[str, Any]]:
+        for index in self._indexes.values():
+            if index.kind != kind:
+                continue
+            item = index.by_id.get(key)
+            if item is None and isinstance(key, str):
+                item = index.by_slug.get(key)
+            if item is not None:
+                return item
+        return None
+
+    def search(
+        self, text: Optional[str] = None, kind: Optional[str] = None, **attributes
+    ) -> List[Dict[str, Any]]:
+        """Find items by words of their texts and by attribute values.
+
+        All words and attributes must match, e.g.
+        `search("pull ups", kind="exercise", equipment="pullup_bar")`.
+        """
+        words = tokenize(text or "")
+        values = [
+            (field, value.lower() if isinstance(value, str) else value)
+            for field, value in attributes.items()
+        ]
+        items = []
+        for index in self._indexes.values():
+            if kind is None or index.kind == kind:
+                items.extend(index.search(words, values))
+        return items
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CoachCatalog":
+        return cls(sources=data["sources"])
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"sources": self._sources}
+
+    @classmethod
+    def from_json(cls, data) -> "CoachCatalog":
+        return cls.from_dict(json.loads(data))
+
+    def as_json(self, **options) -> str:
+        return json.dumps(self.as_dict(), **options)
+
+    @classmethod
+    def from_file(cls, filename: Union[str, pathlib.Path]) -> "CoachCatalog":
+        return cls.from_json(pathlib.Path(filename).read_text())
+
+    def to_file(self, filename: Union[str, pathlib.Path]) -> None:
+        write_text_atomic(pathlib.Path(filename), self.as_json())
@@ -1,33 +1,176 @@
-import json
+import asyncio
+import datetime
 import logging
-from typing import Optional, Union
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import islice
+from typing import (
+    IO,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import httpx
 
 from ._api import ApiRequestBuilder
 from ._auth import FreeleticsAuth
+from ._cache import (
+    PERMANENT_CACHE_POLICY,
+    VARY_HEADERS,
+    BaseCache,
+    CacheEntry,
+    CachePolicy,
+    build_cache_key,
+    find_cache_policy,
+)
+from ._credential_store import SharedCredentialStore
+from ._jsonapi import IdentityMap, Resource
 from ._models import (
     AsyncCoreResponseModel,
     CoreResponseModel,
     Credentials,
+    FetchResult,
     IdToken,
+    PaymentToken,
+    RawResponse,
     RefreshToken,
 )
+from ._payment import PaymentTokenManager
+from ._ratelimit import AdaptiveRateLimiter
+from ._retry import RetryPolicy
+from ._singleflight import AsyncSingleFlight, SingleFlight
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30
+)
+DEFAULT_TIMEOUT = httpx.Timeout(10, connect=5)
+
+
+def parse_date(value: Union[str, datetime.date]) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value[:10])
+
+
+def check_concurrency(concurrency: int) -> None:
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+
+async def aiter_items(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    """Iterate over a sync or async iterable."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def atake(iterator: AsyncIterator[T], n: int) -> List[T]:
+    """Return the next `n` items of an async iterator (or less at its end)."""
+    items = []
+    while len(items) < n:
+        try:
+            items.append(await iterator.__anext__())
+        except StopAsyncIteration:
+            break
+    return items
+
+
+def iter_dates(
+    start: Union[str, datetime.date], end: Union[str, datetime.date]
+) -> Iterator[str]:
+    """Yield all days from `start` to `end` (inclusive) as ISO dates."""
+    day, end = parse_date(start), parse_date(end)
+    while day <= end:
+        yield day.isoformat()
+        day += datetime.timedelta(days=1)
+
 
 class BaseClient:
-    _SESSION: Optional[Union[httpx.Client, httpx.AsyncClient]] = None
+    _SESSION_CLASS: Type[Union[httpx.Client, httpx.AsyncClient]]
+    _SINGLE_FLIGHT_CLASS: Type[Union[SingleFlight, AsyncSingleFlight]]
+
+    def __init__(
+        self,
+        cache: Optional[BaseCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        background_token_refresh: bool = False,
+        credential_store: Optional[SharedCredentialStore] = None,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        timeout: Union[float, httpx.Timeout] = DEFAULT_TIMEOUT,
+        http2: bool = False,
+        lean_responses: bool = False,
+        coalesce_requests: bool = False,
+        cache_policies: Optional[Dict[str, CachePolicy]] = None,
+        payment_tokens: Optional[PaymentTokenManager] = None,
+        **session_options,
+    ) -> None:
+        """Create a client with its own connection pool.
 
-    def __init__(self) -> None:
-        self._api_request_builder = ApiRequestBuilder(self._SESSION)
-        self._SESSION.auth = FreeleticsAuth(
+        `limits`, `timeout` and `http2` configure the pool. HTTP/2 needs the
+        `h2` package (`pip install httpx[http2]`). Further `session_options`
+        are passed to the underlying httpx client (e.g. `transport`).
+        With `lean_responses`, response models decode the body immediately
+        and drop the raw body (see `BaseResponseModel.release_body`).
+        With `coalesce_requests`, identical concurrent GET requests are sent
+        only once and all callers share the response.
+        `cache_policies` maps url path patterns to a `CachePolicy`, matching
+        GET requests are served from the `cache` while it is fresh or stale
+        but revalidated in the background.
+        The payment token for calendar requests is managed by
+        `payment_tokens`, pass one manager to share it between clients.
+        """
+        self._cache = cache
+        self._lean_responses = lean_responses
+        self._single_flight = self._SINGLE_FLIGHT_CLASS() if coalesce_requests else None
+        self._cache_policies = dict(cache_policies or {})
+        self._revalidating: Set[str] = set()
+        self._revalidation_lock = threading.Lock()
+        self._payment_tokens = payment_tokens or PaymentTokenManager()
+        # background revalidation runs in a thread (sync) or tasks (async)
+        self._revalidation_executor: Optional[ThreadPoolExecutor] = None
+        self._revalidation_tasks: Set[asyncio.Future] = set()
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._session = self._SESSION_CLASS(
+            limits=limits, timeout=timeout, http2=http2, **session_options
+        )
+        self._api_request_builder = ApiRequestBuilder(self._session)
+        self._session.auth = FreeleticsAuth(
             id_token=None,
             refresh_token=None,
-            session=self._SESSION,
+            session=self._session,
             api_request_builder=self._api_request_builder,
+            retry_policy=retry_policy,
+            background_refresh=background_token_refresh,
+            credential_store=credential_store,
         )
 
     @classmethod
@@ -37,6 +180,7 @@ class BaseClient:
         refresh_token: Optional[str] = None,
         user_id: Optional[int] = None,
         detect_user_id: bool = False,
+        **kwargs,
     ) -> Union["FreeleticsClient", "AsyncFreeleticsClient"]:
         if id_token is not None:
             id_token = IdToken(id_token, user_id)
@@ -51,21 +195,33 @@ class BaseClient:
             user_id = user_id or id_token.user_id
             refresh_token = RefreshToken(refresh_token, user_id)
 
-        new_cls = cls()
-        new_cls._SESSION.auth.refresh_token = refresh_token
-        new_cls._SESSION.auth.id_token = id_token
+        new_cls = cls(**kwargs)
+        new_cls._session.auth.refresh_token = refresh_token
+        new_cls._session.auth.id_token = id_token
         return new_cls
 
-    def get_credentials(self) -> Credentials:
-        return Credentials(
-            id_token=self._SESSION.auth.id_token.token,
-            refresh_token=self._SESSION.auth.refresh_token.token,
-            user_id=self._SESSION.auth.refresh_token.user_id,
+    @classmethod
+    def from_credential_store(
+        cls, credential_store: SharedCredentialStore, **kwargs
+    ) -> Union["FreeleticsClient", "AsyncFreeleticsClient"]:
+        credentials = credential_store.load()
+        if credentials is None:
+            raise Exception(f"No credentials found in {credential_store.filename}")
+
+        return cls.from_credentials(
+            id_token=credentials.id_token.token,
+            refresh_token=credentials.refresh_token.token,
+            user_id=credentials.user_id,
+            credential_store=credential_store,
+            **kwargs,
         )
 
+    def get_credentials(self) -> Credentials:
+        return self._session.auth.get_credentials()
+
     @property
     def is_authenticated(self) -> bool:
-        auth = self._SESSION.auth
+        auth = self._session.auth
         if auth is not None:
             if auth.refresh_token:
                 return True
@@ -75,10 +231,81 @@ class BaseClient:
 
     @property
     def user_id(self) -> Union[str, int]:
-        if self._SESSION.auth.id_token is not None:
-            return self._SESSION.auth.id_token.user_id
+        if self._session.auth.id_token is not None:
+            return self._session.auth.id_token.user_id
         else:
-            return self._SESSION.auth.refresh_token.user_id
+            return self._session.auth.refresh_token.user_id
+
+    @property
+    def session(self) -> Union[httpx.Client, httpx.AsyncClient]:
+        return self._session
+
+    @property
+    def cache(self) -> Optional[BaseCache]:
+        return self._cache
+
+    @property
+    def payment_tokens(self) -> PaymentTokenManager:
+        return self._payment_tokens
+
+    @property
+    def retry_policy(self) -> Optional[RetryPolicy]:
+        return self._retry_policy
+
+    def _cache_policy(
+        self, request: httpx.Request, cache_policy: Optional[CachePolicy] = None
+    ) -> Optional[CachePolicy]:
+        if self._cache is None or request.method != "GET":
+            return None
+        if cache_policy is not None:
+            return cache_policy
+        return find_cache_policy(self._cache_policies, request)
+
+    def _lookup_cache(
+        self, request: httpx.Request, policy: CachePolicy
+    ) -> Tuple[Optional[httpx.Response], Optional[str]]:
+        """Serve a request from cache, if the cache policy allows it.
+
+        Returns the cached response and the cache key, if the response must
+        be revalidated and no revalidation of the key is running.
+        """
+        namespace = self._cache_namespace()
+        r, stale = self._cache.lookup(request, policy, namespace)
+        if not stale:
+            return r, None
+        key = build_cache_key(request, namespace, policy.vary)
+        with self._revalidation_lock:
+            if key in self._revalidating:
+                return r, None
+            self._revalidating.add(key)
+        return r, key
+
+    def _store_without_etag(
+        self, response: httpx.Response, vary: Sequence[str] = VARY_HEADERS
+    ) -> None:
+        # responses without ETag are not stored by the cache itself, but can
+        # be served by a cache policy
+        if response.status_code == 200 and "ETag" not in response.headers:
+            key = build_cache_key(response.request, self._cache_namespace(), vary)
+            self._cache.put(key, CacheEntry.from_response(response))
+
+    @staticmethod
+    def _copy_request(request: httpx.Request) -> httpx.Request:
+        return httpx.Request(request.method, request.url, headers=request.headers)
+
+    def _coalesce_key(self, request: httpx.Request) -> Optional[str]:
+        if self._single_flight is None or request.method != "GET":
+            return None
+        if "If-None-Match" in request.headers:
+            # a conditional request can be answered with 304 Not Modified,
+            # which must not be shared with unconditional requests
+            return None
+        return build_cache_key(request, self._cache_namespace())
+
+    def _cache_namespace(self) -> Optional[Union[str, int]]:
+        auth = self._session.auth
+        token = auth.refresh_token or auth.id_token
+        return token.user_id if token is not None else None
 
     def _set_auth_from_login_response(self, response) -> None:
         data = response.as_dict()
@@ -87,11 +314,37 @@ class BaseClient:
         id_token = IdToken(token=auth["id_token"], user_id=user_id)
         refresh_token = RefreshToken(token=auth["refresh_token"], user_id=user_id)
 
-        self._SESSION.auth.refresh_token = refresh_token
-        self._SESSION.auth.id_token = id_token
+        self._session.auth.refresh_token = refresh_token
+        self._session.auth.id_token = id_token
+
+        credential_store = self._session.auth.credential_store
+        if credential_store is not None:
+            credential_store.save(self.get_credentials())
+
+    @staticmethod
+    def _has_next_page(
+        response: Union[AsyncCoreResponseModel, CoreResponseModel]
+    ) -> bool:
+        return "next" in response.get("links", {})
+
+    @staticmethod
+    def _filter_activities(
+        response: Union[AsyncCoreResponseModel, CoreResponseModel],
+        activity_type: Optional[str] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        identity_map: Optional[IdentityMap] = None,
+    ) -> Iterator[Union[Dict[str, Any], Resource]]:
+        if identity_map is not None:
+            identity_map.add_all(response.get("included") or [])
+        for item in response["data"]:
+            if activity_type is not None and item["type"] != activity_type:
+                continue
+            if predicate is not None and not predicate(item):
+                continue
+            yield item if identity_map is None else identity_map.add(item)
 
     def get_calendar(
-        self, payment_token
+        self, payment_token: Optional[str] = None
     ) -> Union[AsyncCoreResponseModel, CoreResponseModel]:
         request = self._api_request_builder.get_calendar(payment_token)
         return self.send(request)
@@ -99,11 +352,12 @@ class BaseClient:
     def get_calendar_by_date(
         self,
         date: str,
-        payment_token: str,
+        payment_token: Optional[str] = None,
         distance_unit_system: str = "metric",
         weight_unit_system: str = "metric",
         skill_paths_enabled: str = "true",
     ) -> Union[AsyncCoreResponseModel, CoreResponseModel]:
+        """Get a calendar day, past days are cached permanently (with a cache)."""
         request = self._api_request_builder.get_calendar_by_date(
             date=date,
             payment_token=payment_token,
@@ -111,7 +365,43 @@ class BaseClient:
             weight_unit_system=weight_unit_system,
             skill_paths_enabled=skill_paths_enabled,
         )
-        return self.send(request)
+        cache_policy = None
+        if parse_date(date) < datetime.date.today():
+            # past days do not change anymore
+            cache_policy = PERMANENT_CACHE_POLICY
+        return self.send(request, cache_policy=cache_policy)
+
+    def _cached_calendar_day(self, date: str, **kwargs) -> Optional[httpx.Response]:
+        """Return a past calendar day from cache, without a payment token."""
+        if self._cache is None or parse_date(date) >= datetime.date.today():
+            return None
+        # the payment token is not part of the cache key of past days
+        request = self._api_request_builder.get_calendar_by_date(
+            date=date, payment_token=None, **kwargs
+        )
+        r, _ = self._cache.lookup(
+            request, PERMANENT_CACHE_POLICY, self._cache_namespace()
+        )
+        return r
+
+    def get_calendar_range(
+        self,
+        start: Union[str, datetime.date],
+        end: Union[str, datetime.date],
+        concurrency: int = 10,
+        **kwargs,
+    ) -> Union[Iterator[FetchResult], AsyncIterator[FetchResult]]:
+        """Fetch all days from `start` to `end` (inclusive) concurrently.
+
+        The results are yielded in date order, keys are ISO dates. Further
+        `kwargs` are passed to `get_calendar_by_date`.
+        """
+        return self.fetch_many(
+            iter_dates(start, end),
+            concurrency=concurrency,
+            ordered=True,
+            fetch=partial(self.get_calendar_by_date, **kwargs),
+        )
 
     def get_coach_exercises(self) -> Union[AsyncCoreResponseModel, CoreResponseModel]:
         request = self._api_request_builder.get_coach_exercises()
@@ -171,10 +461,11 @@ class BaseClient:
         return self.send(request)
 
     def get_performed_activities_by_id(
-        self, activity_id: Union[str, int]
-    ) -> Union[AsyncCoreResponseModel, CoreResponseModel]:
+        self, activity_id: Union[str, int], raw: bool = False
+    ) -> Union[AsyncCoreResponseModel, CoreResponseModel, RawResponse]:
+        """Get a performed activity, the undecoded body if `raw` is `True`."""
         request = self._api_request_builder.get_performed_activities_by_id(activity_id)
-        return self.send(request)
+        return self.send_raw(request) if raw else self.send(request)
 
     def get_planned_activities_by_id(
         self, activity_id: Union[str, int]
@@ -215,7 +506,8 @@ class BaseClient:
 
 
 class FreeleticsClient(BaseClient):
-    _SESSION = httpx.Client()
+    _SESSION_CLASS = httpx.Client
+    _SINGLE_FLIGHT_CLASS = SingleFlight
 
     def __enter__(self):
         return self
@@ -224,19 +516,231 @@ class FreeleticsClient(BaseClient):
         self.close()
 
     def close(self) -> None:
-        self._SESSION.close()
+        self._session.auth.stop_background_refresh()
+        if self._revalidation_executor is not None:
+            self._revalidation_executor.shutdown(wait=True)
+        self._session.close()
 
     def request(self, method, url, **kwargs) -> CoreResponseModel:
         request = self._api_request_builder.request(method, url, **kwargs)
         return self.send(request)
 
+    def _transmit(self, request, **kwargs) -> httpx.Response:
+        if self._retry_policy is None:
+            return self._send_limited(request, **kwargs)
+        return self._retry_policy.send(self._send_limited, request, **kwargs)
+
+    def _send_limited(self, request, **kwargs) -> httpx.Response:
+        limiter = self._rate_limiter
+        if limiter is None:
+            return self._session.send(request, **kwargs)
+
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                r = self._session.send(request, **kwargs)
+            except BaseException:
+                limiter.release()
+                raise
+            limiter.release(r.status_code, r.headers.get("Retry-After"))
+            if not limiter.should_retry(r.status_code, attempt):
+                return r
+            r.close()
+            attempt += 1
+            logger.debug("Retry throttled request %s (%s)", request.url, attempt)
+
+    def _send_checked(self, request, **kwargs) -> httpx.Response:
+        key = self._coalesce_key(request)
+        if key is None:
+            return self._send_uncoalesced(request, **kwargs)
+        return self._single_flight.do(
+            key, lambda: self._send_uncoalesced(request, **kwargs)
+        )
+
+    def _send_uncoalesced(
+        self, request, cache_policy: Optional[CachePolicy] = None, **kwargs
+    ) -> httpx.Response:
+        policy = self._cache_policy(request, cache_policy)
+        if policy is None:
+            return self._send_cached(request, **kwargs)
+        r, revalidate_key = self._lookup_cache(request, policy)
+        if r is None:
+            r = self._send_cached(request, vary=policy.vary, **kwargs)
+            self._store_without_etag(r, policy.vary)
+            return r
+        if revalidate_key is not None:
+            with self._revalidation_lock:
+                if self._revalidation_executor is None:
+                    self._revalidation_executor = ThreadPoolExecutor(max_workers=1)
+            self._revalidation_executor.submit(
+                self._revalidate,
+                self._copy_request(request),
+                revalidate_key,
+                policy.vary,
+            )
+        return r
+
+    def _revalidate(self, request, key: str, vary: Sequence[str]) -> None:
+        try:
+            r = self._send_cached(request, vary=vary)
+            self._store_without_etag(r, vary)
+        except Exception as exc:
+            logger.warning("Revalidation of %s failed: %s", request.url, exc)
+        finally:
+            with self._revalidation_lock:
+                self._revalidating.discard(key)
+
+    def _send_cached(
+        self, request, vary: Sequence[str] = VARY_HEADERS, **kwargs
+    ) -> httpx.Response:
+        if self._cache is None:
+            r = self._transmit(request, **kwargs)
+        else:
+            namespace = self._cache_namespace()
+            entry = self._cache.prepare_request(request, namespace, vary)
+            r = self._transmit(request, **kwargs)
+            r = self._cache.process_response(r, entry, namespace, vary)
+        # a 304 left here answers an If-None-Match header set by the caller
+        if r.status_code != 304:
+            r.raise_for_status()
+        return r
+
     def send(self, request, **kwargs) -> CoreResponseModel:
-        r = self._SESSION.send(request, **kwargs)
-        r.raise_for_status()
+        r = self._send_checked(request, **kwargs)
+        return CoreResponseModel(
+            data=None, response=r, session=self._session, lean=self._lean_responses
+        )
+
+    def send_raw(self, request, **kwargs) -> RawResponse:
+        """Send a request and return the body without decoding it."""
+        r = self._send_checked(request, **kwargs)
+        return RawResponse(r, content=r.content)
+
+    def stream_raw(
+        self, request, fp: IO[bytes], chunk_size: Optional[int] = None, **kwargs
+    ) -> RawResponse:
+        """Write the response body into `fp` while it is received.
+
+        The body is never held in memory as a whole. Streamed responses
+        bypass the response cache.
+        """
+        r = self._transmit(request, stream=True, **kwargs)
         try:
-            return CoreResponseModel(data=r.json(), response=r, session=self._SESSION)
-        except json.JSONDecodeError:
-            return CoreResponseModel(data={}, response=r, session=self._SESSION)
+            r.raise_for_status()
+            size = 0
+            for chunk in r.iter_bytes(chunk_size):
+                size += fp.write(chunk)
+        finally:
+            r.close()
+        return RawResponse(r, size=size)
+
+    def get_payment_token(self) -> PaymentToken:
+        """Return the cached payment token, fetch or renew it if needed."""
+        return self._payment_tokens.get_token(self)
+
+    def get_calendar(self, payment_token: Optional[str] = None) -> CoreResponseModel:
+        if payment_token is None:
+            payment_token = self.get_payment_token().token
+        return super().get_calendar(payment_token)
+
+    def get_calendar_by_date(
+        self, date: str, payment_token: Optional[str] = None, **kwargs
+    ) -> CoreResponseModel:
+        if payment_token is None:
+            r = self._cached_calendar_day(date, **kwargs)
+            if r is not None:
+                return CoreResponseModel(
+                    data=None,
+                    response=r,
+                    session=self._session,
+                    lean=self._lean_responses,
+                )
+            payment_token = self.get_payment_token().token
+        return super().get_calendar_by_date(date, payment_token, **kwargs)
+
+    def iter_user_activities(
+        self,
+        user_id: Optional[Union[str, int]] = None,
+        activity_type: Optional[str] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        identity_map: Optional[IdentityMap] = None,
+    ) -> Iterator[Union[Dict[str, Any], Resource]]:
+        """Iterate over all activities of a user, page by page.
+
+        The next page is fetched in a background thread while the items of
+        the current page are processed. With an `identity_map`, the items
+        are normalized into shared `Resource` objects.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        page = 1
+        future = executor.submit(self.get_user_activities_by_id, user_id, page)
+        try:
+            while future is not None:
+                r = future.result()
+                if self._has_next_page(r):
+                    page += 1
+                    future = executor.submit(
+                        self.get_user_activities_by_id, user_id, page
+                    )
+                else:
+                    future = None
+                yield from self._filter_activities(
+                    r, activity_type, predicate, identity_map
+                )
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def fetch_many(
+        self,
+        ids: Iterable[Union[str, int]],
+        concurrency: int = 10,
+        ordered: bool = False,
+        fetch: Optional[Callable[[Union[str, int]], CoreResponseModel]] = None,
+    ) -> Iterator[FetchResult]:
+        """Fetch many items with a bounded number of worker threads.
+
+        By default, performed activities are fetched. Results are yielded as
+        they complete or in input order, if `ordered` is `True`. Errors are
+        reported per item in the `FetchResult`. New requests are only started
+        when results are consumed.
+        """
+        check_concurrency(concurrency)
+        fetch = fetch or self.get_performed_activities_by_id
+
+        def job(key):
+            try:
+                return FetchResult(key, response=fetch(key))
+            except Exception as exc:
+                logger.debug("Fetching %s failed: %s", key, exc)
+                return FetchResult(key, error=exc)
+
+        ids = iter(ids)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        def fill() -> None:
+            for key in islice(ids, concurrency - len(pending)):
+                pending.append(executor.submit(job, key))
+
+        try:
+            fill()
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                for future in done:
+                    yield future.result()
+                fill()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def login(self, username, password) -> CoreResponseModel:
         request = self._api_request_builder.login_user(
@@ -250,17 +754,19 @@ class FreeleticsClient(BaseClient):
 
     def logout(self) -> CoreResponseModel:
         request = self._api_request_builder.logout_user(
-            refresh_token=self._SESSION.auth.refresh_token.token,
-            user_id=self._SESSION.auth.refresh_token.user_id,
+            refresh_token=self._session.auth.refresh_token.token,
+            user_id=self._session.auth.refresh_token.user_id,
         )
         response = self.send(request)
-        self._SESSION.auth._refresh_token = None
-        self._SESSION.auth._id_token = None
+        self._session.auth.stop_background_refresh()
+        self._session.auth._refresh_token = None
+        self._session.auth._id_token = None
         return response
 
 
 class AsyncFreeleticsClient(BaseClient):
-    _SESSION = httpx.AsyncClient()
+    _SESSION_CLASS = httpx.AsyncClient
+    _SINGLE_FLIGHT_CLASS = AsyncSingleFlight
 
     async def __aenter__(self):
         return self
@@ -269,21 +775,252 @@ class AsyncFreeleticsClient(BaseClient):
         await self.close()
 
     async def close(self) -> None:
-        await self._SESSION.aclose()
+        await self._session.auth.async_stop_background_refresh()
+        tasks = list(self._revalidation_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._session.aclose()
 
     async def request(self, method, url, **kwargs) -> AsyncCoreResponseModel:
         request = self._api_request_builder.request(method, url, **kwargs)
         return await self.send(request)
 
+    @staticmethod
+    async def _run_blocking(fn: Callable[..., Any], *args) -> Any:
+        # cache backends like SQLiteCache do blocking I/O, which must not
+        # block the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(fn, *args))
+
+    async def _transmit(self, request, **kwargs) -> httpx.Response:
+        if self._retry_policy is None:
+            return await self._send_limited(request, **kwargs)
+        return await self._retry_policy.async_send(
+            self._send_limited, request, **kwargs
+        )
+
+    async def _send_limited(self, request, **kwargs) -> httpx.Response:
+        limiter = self._rate_limiter
+        if limiter is None:
+            return await self._session.send(request, **kwargs)
+
+        attempt = 0
+        while True:
+            await limiter.async_acquire()
+            try:
+                r = await self._session.send(request, **kwargs)
+            except BaseException:
+                limiter.release()
+                raise
+            limiter.release(r.status_code, r.headers.get("Retry-After"))
+            if not limiter.should_retry(r.status_code, attempt):
+                return r
+            await r.aclose()
+            attempt += 1
+            logger.debug("Retry throttled request %s (%s)", request.url, attempt)
+
+    async def _send_checked(self, request, **kwargs) -> httpx.Response:
+        key = self._coalesce_key(request)
+        if key is None:
+            return await self._send_uncoalesced(request, **kwargs)
+        return await self._single_flight.do(
+            key, lambda: self._send_uncoalesced(request, **kwargs)
+        )
+
+    async def _send_uncoalesced(
+        self, request, cache_policy: Optional[CachePolicy] = None, **kwargs
+    ) -> httpx.Response:
+        policy = self._cache_policy(request, cache_policy)
+        if policy is None:
+            return await self._send_cached(request, **kwargs)
+        r, revalidate_key = await self._run_blocking(
+            self._lookup_cache, request, policy
+        )
+        if r is None:
+            r = await self._send_cached(request, vary=policy.vary, **kwargs)
+            await self._run_blocking(self._store_without_etag, r, policy.vary)
+            return r
+        if revalidate_key is not None:
+            task = asyncio.ensure_future(
+                self._revalidate(
+                    self._copy_request(request), revalidate_key, policy.vary
+                )
+            )
+            self._revalidation_tasks.add(task)
+            task.add_done_callback(self._revalidation_tasks.discard)
+        return r
+
+    async def _revalidate(self, request, key: str, vary: Sequence[str]) -> None:
+        try:
+            r = await self._send_cached(request, vary=vary)
+            await self._run_blocking(self._store_without_etag, r, vary)
+        except Exception as exc:
+            logger.warning("Revalidation of %s failed: %s", request.url, exc)
+        finally:
+            with self._revalidation_lock:
+                self._revalidating.discard(key)
+
+    async def _send_cached(
+        self, request, vary: Sequence[str] = VARY_HEADERS, **kwargs
+    ) -> httpx.Response:
+        if self._cache is None:
+            r = await self._transmit(request, **kwargs)
+        else:
+            namespace = self._cache_namespace()
+            entry = await self._run_blocking(
+                self._cache.prepare_request, request, namespace, vary
+            )
+            r = await self._transmit(request, **kwargs)
+            r = await self._run_blocking(
+                self._cache.process_response, r, entry, namespace, vary
+            )
+        if r.status_code != 304:
+            r.raise_for_status()
+        return r
+
     async def send(self, request, **kwargs) -> AsyncCoreResponseModel:
-        r = await self._SESSION.send(request, **kwargs)
-        r.raise_for_status()
+        r = await self._send_checked(request, **kwargs)
+        return AsyncCoreResponseModel(
+            data=None, response=r, session=self._session, lean=self._lean_responses
+        )
+
+    async def send_raw(self, request, **kwargs) -> RawResponse:
+        """Send a request and return the body without decoding it."""
+        r = await self._send_checked(request, **kwargs)
+        return RawResponse(r, content=r.content)
+
+    async def stream_raw(
+        self, request, fp: IO[bytes], chunk_size: Optional[int] = None, **kwargs
+    ) -> RawResponse:
+        """Write the response body into `fp` while it is received.
+
+        The body is never held in memory as a whole. Streamed responses
+        bypass the response cache.
+        """
+        r = await self._transmit(request, stream=True, **kwargs)
         try:
-            return AsyncCoreResponseModel(
-                data=r.json(), response=r, session=self._SESSION
+            r.raise_for_status()
+            size = 0
+            async for chunk in r.aiter_bytes(chunk_size):
+                size += fp.write(chunk)
+        finally:
+            await r.aclose()
+        return RawResponse(r, size=size)
+
+    async def get_payment_token(self) -> PaymentToken:
+        """Return the cached payment token, fetch or renew it if needed."""
+        return await self._payment_tokens.async_get_token(self)
+
+    async def get_calendar(
+        self, payment_token: Optional[str] = None
+    ) -> AsyncCoreResponseModel:
+        if payment_token is None:
+            payment_token = (await self.get_payment_token()).token
+        return await super().get_calendar(payment_token)
+
+    async def get_calendar_by_date(
+        self, date: str, payment_token: Optional[str] = None, **kwargs
+    ) -> AsyncCoreResponseModel:
+        if payment_token is None:
+            r = await self._run_blocking(
+                partial(self._cached_calendar_day, date, **kwargs)
             )
-        except json.JSONDecodeError:
-            return AsyncCoreResponseModel(data={}, response=r, session=self._SESSION)
+            if r is not None:
+                return AsyncCoreResponseModel(
+                    data=None,
+                    response=r,
+                    session=self._session,
+                    lean=self._lean_responses,
+                )
+            payment_token = (await self.get_payment_token()).token
+        return await super().get_calendar_by_date(date, payment_token, **kwargs)
+
+    async def iter_user_activities(
+        self,
+        user_id: Optional[Union[str, int]] = None,
+        activity_type: Optional[str] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        identity_map: Optional[IdentityMap] = None,
+    ) -> AsyncIterator[Union[Dict[str, Any], Resource]]:
+        """Iterate over all activities of a user, page by page.
+
+        The next page is fetched in a background task while the items of
+        the current page are processed. With an `identity_map`, the items
+        are normalized into shared `Resource` objects.
+        """
+        page = 1
+        task = asyncio.ensure_future(self.get_user_activities_by_id(user_id, page))
+        try:
+            while task is not None:
+                r = await task
+                if self._has_next_page(r):
+                    page += 1
+                    task = asyncio.ensure_future(
+                        self.get_user_activities_by_id(user_id, page)
+                    )
+                else:
+                    task = None
+                for item in self._filter_activities(
+                    r, activity_type, predicate, identity_map
+                ):
+                    yield item
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def fetch_many(
+        self,
+        ids: Union[Iterable[Union[str, int]], AsyncIterable[Union[str, int]]],
+        concurrency: int = 10,
+        ordered: bool = False,
+        fetch: Optional[
+            Callable[[Union[str, int]], Awaitable[AsyncCoreResponseModel]]
+        ] = None,
+    ) -> AsyncIterator[FetchResult]:
+        """Fetch many items with at most `concurrency` requests in flight.
+
+        `ids` can be an async iterable. By default, performed activities are
+        fetched. Results are yielded as they complete or in input order, if
+        `ordered` is `True`. Errors are reported per item in the
+        `FetchResult`. New requests are only started when results are
+        consumed.
+        """
+        check_concurrency(concurrency)
+        fetch = fetch or self.get_performed_activities_by_id
+
+        async def job(key):
+            try:
+                return FetchResult(key, response=await fetch(key))
+            except Exception as exc:
+                logger.debug("Fetching %s failed: %s", key, exc)
+                return FetchResult(key, error=exc)
+
+        ids = aiter_items(ids)
+        pending = deque()
+
+        async def fill() -> None:
+            for key in await atake(ids, concurrency - len(pending)):
+                pending.append(asyncio.ensure_future(job(key)))
+
+        try:
+            await fill()
+            while pending:
+                if ordered:
+                    await pending[0]
+                    done = [pending.popleft()]
+                else:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        pending.remove(task)
+                for task in done:
+                    yield task.result()
+                await fill()
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def login(self, username, password) -> AsyncCoreResponseModel:
         request = self._api_request_builder.login_user(
@@ -297,10 +1034,11 @@ class AsyncFreeleticsClient(BaseClient):
 
     async def logout(self) -> AsyncCoreResponseModel:
         request = self._api_request_builder.logout_user(
-            refresh_token=self._SESSION.auth.refresh_token.token,
-            user_id=self._SESSION.auth.refresh_token.user_id,
+            refresh_token=self._session.auth.refresh_token.token,
+            user_id=self._session.auth.refresh_token.user_id,
         )
         response = await self.send(request)
-        self._SESSION.auth._refresh_token = None
-        self._SESSION.auth._id_token = None
+        await self._session.auth.async_stop_background_refresh()
+        self._session.auth._refresh_token = None
+        self._session.auth._id_token = None
         return response
@@ -0,0 +1,236 @@
+import pathlib
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from ._models import BaseResponseModel
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+Path = Tuple[str, ...]
+
+DTYPES = ("int", "float", "bool", "str", "datetime")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise Exception("numpy is required, please install it with pip install numpy")
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise Exception(
+            "pyarrow is required, please install it with pip install pyarrow"
+        )
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    """Convert an ISO 8601 timestamp into seconds since epoch (UTC)."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+class ActivityColumn:
+    """Describes how a column is extracted from an activity payload.
+
+    `paths` are tried in order, the first existing value is used. `convert`
+    is applied to found values (e.g. `len` to count exercise rounds).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        paths: Sequence[Union[str, Path]],
+        dtype: str,
+        convert: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        if dtype not in DTYPES:
+            raise Exception(f"dtype must be one of {', '.join(DTYPES)}")
+        self.name = name
+        self.paths = [tuple(p.split(".")) if isinstance(p, str) else p for p in paths]
+        self.dtype = dtype
+        self.convert = convert
+
+    def extract(self, data: Dict[str, Any]) -> Any:
+        for path in self.paths:
+            value = data
+            for key in path:
+                if not isinstance(value, dict) or key not in value:
+                    break
+                value = value[key]
+            else:
+                if value is None:
+                    continue
+                if self.convert is not None:
+                    value = self.convert(value)
+                if self.dtype == "datetime":
+                    value = parse_timestamp(value)
+                return value
+        return None
+
+
+DEFAULT_ACTIVITY_COLUMNS = (
+    ActivityColumn("id", ["performed_activity.id", "id"], "int"),
+    ActivityColumn("user_id", ["performed_activity.user_id", "user_id"], "int"),
+    ActivityColumn(
+        "completed_at",
+        ["performed_activity.completed_at", "completed_at"],
+        "datetime",
+    ),
+    ActivityColumn(
+        "duration",
+        [
+            "performed_activity.duration",
+            "performed_activity.seconds",
+            "duration",
+            "seconds",
+        ],
+        "float",
+    ),
+    ActivityColumn("points", ["performed_activity.points", "points"], "float"),
+    ActivityColumn(
+        "workout_slug",
+        [
+            "performed_activity.workout_slug",
+            "performed_activity.activity.slug",
+            "workout_slug",
+        ],
+        "str",
+    ),
+    ActivityColumn(
+        "rounds",
+        ["performed_activity.rounds", "performed_activity.blocks", "rounds"],
+        "int",
+        convert=lambda v: len(v) if isinstance(v, list) else v,
+    ),
+    ActivityColumn(
+        "is_personal_best",
+        ["performed_activity.is_personal_best", "is_personal_best"],
+        "bool",
+    ),
+)
+
+
+def collect_columns(
+    activities: Iterable[Union[BaseResponseModel, Dict[str, Any]]],
+    columns: Sequence[ActivityColumn] = DEFAULT_ACTIVITY_COLUMNS,
+) -> Dict[str, List[Any]]:
+    """Flatten activity payloads into one list of values per column."""
+    values: Dict[str, List[Any]] = {c.name: [] for c in columns}
+    for activity in activities:
+        if isinstance(activity, BaseResponseModel):
+            activity = activity.as_dict()
+        for column in columns:
+            values[column.name].append(column.extract(activity))
+    return values
+
+
+def _numpy_array(column: ActivityColumn, values: List[Any]) -> "np.ndarray":
+    if column.dtype == "int":
+        return np.array([-1 if v is None else v for v in values], dtype=np.int64)
+    if column.dtype == "float":
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if column.dtype == "bool":
+        return np.array([bool(v) for v in values], dtype=np.bool_)
+    if column.dtype == "datetime":
+        return np.array(
+            [np.datetime64("NaT") if v is None else v for v in values],
+            dtype="datetime64[s]",
+        )
+    return np.array(["" if v is None else str(v) for v in values], dtype=np.str_)
+
+
+def activities_to_numpy(
+    activities: Iterable[Union[BaseResponseModel, Dict[str, Any]]],
+    columns: Sequence[ActivityColumn] = DEFAULT_ACTIVITY_COLUMNS,
+) -> "np.ndarray":
+    """Convert activities into a NumPy structured array.
+
+    Missing values are `-1` for int, `NaN` for float, `False` for bool,
+    `""` for str and `NaT` for datetime columns.
+    """
+    _require_numpy()
+    values = collect_columns(activities, columns)
+    arrays = [_numpy_array(c, values[c.name]) for c in columns]
+    dtype = [(c.name, a.dtype) for c, a in zip(columns, arrays)]
+    result = np.empty(len(arrays[0]) if arrays else 0, dtype=dtype)
+    for column, array in zip(columns, arrays):
+        result[column.name] = array
+    return result
+
+
+def _arrow_type(dtype: str) -> "pa.DataType":
+    return {
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "str": pa.string(),
+        "datetime": pa.timestamp("s", tz="UTC"),
+    }[dtype]
+
+
+def activities_to_arrow(
+    activities: Iterable[Union[BaseResponseModel, Dict[str, Any]]],
+    columns: Sequence[ActivityColumn] = DEFAULT_ACTIVITY_COLUMNS,
+) -> "pa.Table":
+    """Convert activities into an Arrow table, missing values are null."""
+    _require_pyarrow()
+    values = collect_columns(activities, columns)
+    return pa.table(
+        {c.name: pa.array(values[c.name], type=_arrow_type(c.dtype)) for c in columns}
+    )
+
+
+def write_activities_npz(
+    activities: Iterable[Union[BaseResponseModel, Dict[str, Any]]],
+    filename: Union[str, pathlib.Path],
+    columns: Sequence[ActivityColumn] = DEFAULT_ACTIVITY_COLUMNS,
+) -> None:
+    """Write one array per column into a compressed `.npz` file."""
+    array = activities_to_numpy(activities, columns)
+    np.savez_compressed(filename, **{name: array[name] for name in array.dtype.names})
+
+
+def read_activities_npz(filename: Union[str, pathlib.Path]) -> "np.ndarray":
+    _require_numpy()
+    with np.load(filename) as data:
+        names = list(data.files)
+        dtype = [(name, data[name].dtype) for name in names]
+        result = np.empty(len(data[names[0]]) if names else 0, dtype=dtype)
+        for name in names:
+            result[name] = data[name]
+    return result
+
+
+def write_activities_parquet(
+    activities: Iterable[Union[BaseResponseModel, Dict[str, Any]]],
+    filename: Union[str, pathlib.Path],
+    columns: Sequence[ActivityColumn] = DEFAULT_ACTIVITY_COLUMNS,
+) -> None:
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    pq.write_table(activities_to_arrow(activities, columns), str(filename))
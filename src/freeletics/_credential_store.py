@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import AsyncIterator, Iterator, Optional, Union
+
+from ._models import Credentials, IdToken
+
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+except ImportError:  # pragma: no cover
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class SharedCredentialStore:
+    """Credential file which can be shared by several processes.
+
+    Writes are atomic and a lock file guarantees that only one process
+    refreshes the id_token at a time. The other processes pick up the new
+    id_token from the file instead of refreshing it themselves.
+    """
+
+    def __init__(
+        self,
+        filename: Union[str, pathlib.Path],
+        lock_timeout: float = 60,
+        poll_interval: float = 0.05,
+    ) -> None:
+        self._file = pathlib.Path(filename)
+        self._lock_file = self._file.with_name(self._file.name + ".lock")
+        self._lock_timeout = lock_timeout
+        self._poll_interval = poll_interval
+        # a plain lock, because the async client acquires and releases the
+        # lock in different executor threads
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    @property
+    def filename(self) -> pathlib.Path:
+        return self._file
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        fd = os.open(self._lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + self._lock_timeout
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                os.close(fd)
+                self._thread_lock.release()
+                raise TimeoutError(f"Could not lock {self._lock_file}")
+            time.sleep(self._poll_interval)
+        self._fd = fd
+
+    def release(self) -> None:
+        _unlock(self._fd)
+        os.close(self._fd)
+        self._fd = None
+        self._thread_lock.release()
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _release_acquired(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.release()
+
+    @contextlib.asynccontextmanager
+    async def async_locked(self) -> AsyncIterator[None]:
+        # waiting for the file lock must not block the event loop
+        loop = asyncio.get_running_loop()
+        acquiring = loop.run_in_executor(None, self.acquire)
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # the executor thread still takes the lock, release it then
+            acquiring.add_done_callback(self._release_acquired)
+            raise
+        try:
+            yield
+        finally:
+            self.release()
+
+    def load(self) -> Optional[Credentials]:
+        if not self._file.exists():
+            return None
+        return Credentials.from_file(self._file)
+
+    def save(self, credentials: Credentials, locked: bool = False) -> None:
+        """Save credentials, use `locked` if the caller already holds the lock."""
+        if locked:
+            credentials.to_file(self._file)
+        else:
+            with self.locked():
+                credentials.to_file(self._file)
+        logger.debug("Saved credentials to %s", self._file)
+
+    def newer_id_token(
+        self, id_token: Optional[IdToken], min_lifetime: float = 20
+    ) -> Optional[IdToken]:
+        """Return the stored id_token if it expires later than `id_token`."""
+        credentials = self.load()
+        if credentials is None or credentials.id_token is None:
+            return None
+
+        stored = credentials.id_token
+        if stored.expires_in_seconds < min_lifetime:
+            return None
+        if id_token is not None and (
+            stored.token == id_token.token
+            or stored.expires_timestamp <= id_token.expires_timestamp
+        ):
+            return None
+        return stored
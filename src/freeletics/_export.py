@@ -0,0 +1,198 @@
+import bz2
+import gzip
+import logging
+import lzma
+import pathlib
+from functools import partial
+from typing import (
+    IO,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
+
+from . import _json
+from ._models import (
+    BaseResponseModel,
+    FetchResult,
+    RawResponse,
+    get_activity_object,
+)
+
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+def _encode_record(
+    item: Union[BaseResponseModel, RawResponse, Dict[str, Any]]
+) -> bytes:
+    if isinstance(item, RawResponse):
+        if item.content is None:
+            raise ValueError("The body of a streamed response cannot be exported")
+        content = item.content
+    elif isinstance(item, BaseResponseModel) and not item.is_decoded:
+        content = item.response.content
+    else:
+        return _json.dumps(item, default=lambda o: o.as_dict()).encode("utf-8")
+
+    if not content.strip():
+        raise ValueError("An empty response body cannot be exported")
+    # line breaks are only allowed as whitespace in JSON documents,
+    # the raw body can be written without decoding and encoding it
+    return content.replace(b"\r", b"").replace(b"\n", b"")
+
+
+class NDJSONWriter:
+    """Write one JSON document per line to a file.
+
+    The file is compressed, if the filename ends with `.gz`, `.bz2` or `.xz`.
+    The file is flushed after every `flush_every` records, so a partial
+    export is usable, if the process dies.
+    """
+
+    def __init__(
+        self,
+        filename: Union[str, pathlib.Path],
+        flush_every: int = 100,
+        append: bool = False,
+    ) -> None:
+        self._file = pathlib.Path(filename)
+        self._flush_every = flush_every
+        self._count = 0
+        opener = COMPRESSIONS.get(self._file.suffix, open)
+        self._fp: IO[bytes] = opener(self._file, "ab" if append else "wb")
+
+    def __enter__(self) -> "NDJSONWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def write(self, item: Union[BaseResponseModel, RawResponse, Dict]) -> None:
+        self._fp.write(_encode_record(item) + b"\n")
+        self._count += 1
+        if self._count % self._flush_every == 0:
+            self._fp.flush()
+
+    def write_all(self, items: Iterable[Union[BaseResponseModel, Dict]]) -> int:
+        for item in items:
+            self.write(item)
+        return self._count
+
+    async def async_write_all(
+        self, items: AsyncIterable[Union[BaseResponseModel, Dict]]
+    ) -> int:
+        async for item in items:
+            self.write(item)
+        return self._count
+
+    def close(self) -> None:
+        if not self._fp.closed:
+            self._fp.close()
+            logger.info("Wrote %s records to %s", self._count, self._file)
+
+
+def read_ndjson(filename: Union[str, pathlib.Path]) -> Iterator[Any]:
+    file = pathlib.Path(filename)
+    opener = COMPRESSIONS.get(file.suffix, open)
+    with opener(file, "rb") as fp:
+        for line in fp:
+            if line.strip():
+                yield _json.loads(line)
+
+
+def _performed_activity_ids(items: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for item in items:
+        aod = get_activity_object(item)
+        if aod is not None:
+            yield aod["id"]
+
+
+def _write_result(writer: NDJSONWriter, result: FetchResult) -> None:
+    error = result.error
+    if result.ok:
+        try:
+            writer.write(result.response)
+            return
+        except ValueError as exc:
+            error = exc
+    logger.warning("Skip activity %s: %s", result.key, error)
+
+
+async def _async_performed_activity_ids(
+    items: AsyncIterable[Dict[str, Any]]
+) -> AsyncIterator[str]:
+    async for item in items:
+        aod = get_activity_object(item)
+        if aod is not None:
+            yield aod["id"]
+
+
+def export_performed_activities(
+    client,
+    filename: Union[str, pathlib.Path],
+    activity_ids: Optional[Iterable[Union[str, int]]] = None,
+    concurrency: int = 10,
+    **options,
+) -> int:
+    """Export performed activities to a (compressed) NDJSON file.
+
+    Without `activity_ids`, all completed trainings of the user are exported.
+    Every activity is written as soon as it arrives, without decoding it.
+    Returns the number of written activities.
+    """
+    if activity_ids is None:
+        activities = client.iter_user_activities(activity_type="training_completed")
+        activity_ids = _performed_activity_ids(activities)
+
+    fetch = partial(client.get_performed_activities_by_id, raw=True)
+    with NDJSONWriter(filename, **options) as writer:
+        for result in client.fetch_many(
+            activity_ids, concurrency=concurrency, fetch=fetch
+        ):
+            _write_result(writer, result)
+        return writer.count
+
+
+async def async_export_performed_activities(
+    client,
+    filename: Union[str, pathlib.Path],
+    activity_ids: Optional[
+        Union[Iterable[Union[str, int]], AsyncIterable[Union[str, int]]]
+    ] = None,
+    concurrency: int = 10,
+    **options,
+) -> int:
+    """Export performed activities to a (compressed) NDJSON file.
+
+    Without `activity_ids`, all completed trainings of the user are exported.
+    Activities are fetched while the activity feed is paged and every
+    activity is written as soon as it arrives, without decoding it.
+    Returns the number of written activities.
+    """
+    if activity_ids is None:
+        activities = client.iter_user_activities(activity_type="training_completed")
+        activity_ids = _async_performed_activity_ids(activities)
+
+    fetch = partial(client.get_performed_activities_by_id, raw=True)
+    with NDJSONWriter(filename, **options) as writer:
+        async for result in client.fetch_many(
+            activity_ids, concurrency=concurrency, fetch=fetch
+        ):
+            _write_result(writer, result)
+        return writer.count
@@ -0,0 +1,119 @@
+import json
+import logging
+from typing import Any, Callable, Optional, Union
+
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class JsonBackend:
+    """Decode and encode JSON with the stdlib `json` module."""
+
+    name = "json"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    def dumps(
+        self, obj: Any, default: Optional[Callable[[Any], Any]] = None, **options
+    ) -> str:
+        return json.dumps(obj, default=default, **options)
+
+
+class OrjsonBackend(JsonBackend):
+    """Decode and encode JSON with `orjson`.
+
+    Formatting options like `indent` are not supported by orjson, in this
+    case the stdlib `json` module is used.
+    """
+
+    name = "orjson"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(
+        self, obj: Any, default: Optional[Callable[[Any], Any]] = None, **options
+    ) -> str:
+        if options:
+            return super().dumps(obj, default=default, **options)
+        return orjson.dumps(obj, default=default).decode("utf-8")
+
+
+class MsgspecBackend(JsonBackend):
+    """Decode and encode JSON with `msgspec`.
+
+    Formatting options like `indent` are not supported by msgspec, in this
+    case the stdlib `json` module is used.
+    """
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._decoder.decode(data)
+
+    def dumps(
+        self, obj: Any, default: Optional[Callable[[Any], Any]] = None, **options
+    ) -> str:
+        if options:
+            return super().dumps(obj, default=default, **options)
+        return msgspec.json.encode(obj, enc_hook=default).decode("utf-8")
+
+
+_BACKENDS = {
+    "json": (JsonBackend, True),
+    "orjson": (OrjsonBackend, orjson is not None),
+    "msgspec": (MsgspecBackend, msgspec is not None),
+}
+
+
+def _detect_backend() -> JsonBackend:
+    for name in ("orjson", "msgspec"):
+        backend_cls, available = _BACKENDS[name]
+        if available:
+            return backend_cls()
+    return JsonBackend()
+
+
+_backend = _detect_backend()
+
+
+def get_json_backend() -> JsonBackend:
+    return _backend
+
+
+def set_json_backend(backend: Union[str, JsonBackend]) -> None:
+    """Set the JSON backend by name (`json`, `orjson`, `msgspec`) or instance."""
+    global _backend
+
+    if isinstance(backend, str):
+        if backend not in _BACKENDS:
+            raise Exception(f"Unknown JSON backend {backend}")
+        backend_cls, available = _BACKENDS[backend]
+        if not available:
+            raise Exception(f"JSON backend {backend} is not installed")
+        backend = backend_cls()
+
+    _backend = backend
+    logger.debug("Use JSON backend %s", backend.name)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return _backend.loads(data)
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, **options) -> str:
+    return _backend.dumps(obj, default=default, **options)
@@ -0,0 +1,137 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+Related = Union["Resource", List["Resource"], None]
+
+
+class Resource:
+    """A JSON:API resource object with resolved relationships.
+
+    Relationships point to the shared `Resource` objects of the identity
+    map. A related resource which was not part of a document yet is a stub
+    without attributes (`is_loaded` is `False`) until it is seen.
+    """
+
+    __slots__ = ("type", "id", "attributes", "relationships", "links", "meta")
+
+    def __init__(self, type_: str, id_: str) -> None:
+        self.type = type_
+        self.id = id_
+        self.attributes: Dict[str, Any] = {}
+        self.relationships: Dict[str, Related] = {}
+        self.links: Optional[Dict[str, Any]] = None
+        self.meta: Optional[Dict[str, Any]] = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.type, self.id
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self.attributes or self.relationships)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.attributes[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.attributes.get(name, default)
+
+    def related(self, name: str) -> Related:
+        return self.relationships.get(name)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the resource as a JSON:API resource object."""
+
+        def identifier(resource: "Resource") -> Dict[str, str]:
+            return {"type": resource.type, "id": resource.id}
+
+        relationships = {}
+        for name, related in self.relationships.items():
+            if isinstance(related, list):
+                data = [identifier(r) for r in related]
+            else:
+                data = None if related is None else identifier(related)
+            relationships[name] = {"data": data}
+
+        data = {"type": self.type, "id": self.id, "attributes": self.attributes}
+        if relationships:
+            data["relationships"] = relationships
+        if self.links is not None:
+            data["links"] = self.links
+        if self.meta is not None:
+            data["meta"] = self.meta
+        return data
+
+    def __repr__(self) -> str:
+        return f"<Resource {self.type}:{self.id}>"
+
+
+class IdentityMap:
+    """Normalizes JSON:API documents into shared `Resource` objects.
+
+    Every resource exists once per `(type, id)`, no matter how many pages
+    contain or reference it. Lookups by type and id are dict lookups.
+    """
+
+    def __init__(self) -> None:
+        self._resources: Dict[Tuple[str, str], Resource] = {}
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+    def __contains__(self, key: Tuple[str, Union[str, int]]) -> bool:
+        type_, id_ = key
+        return (type_, str(id_)) in self._resources
+
+    def __iter__(self) -> Iterator[Resource]:
+        return iter(self._resources.values())
+
+    def get(self, type_: str, id_: Union[str, int]) -> Optional[Resource]:
+        return self._resources.get((type_, str(id_)))
+
+    def resources(self, type_: str) -> List[Resource]:
+        return [r for r in self._resources.values() if r.type == type_]
+
+    def _resolve(self, identifier: Optional[Dict[str, Any]]) -> Optional[Resource]:
+        if identifier is None:
+            return None
+        key = (identifier["type"], str(identifier["id"]))
+        resource = self._resources.get(key)
+        if resource is None:
+            resource = self._resources[key] = Resource(*key)
+        return resource
+
+    def add(self, data: Dict[str, Any]) -> Resource:
+        """Add or update a resource object and return the shared resource."""
+        resource = self._resolve(data)
+        resource.attributes.update(data.get("attributes") or {})
+        for name, relationship in (data.get("relationships") or {}).items():
+            if "data" not in relationship:
+                continue
+            related = relationship["data"]
+            if isinstance(related, list):
+                resource.relationships[name] = [self._resolve(r) for r in related]
+            else:
+                resource.relationships[name] = self._resolve(related)
+        if "links" in data:
+            resource.links = data["links"]
+        if "meta" in data:
+            resource.meta = data["meta"]
+        return resource
+
+    def add_all(self, items: Iterable[Dict[str, Any]]) -> List[Resource]:
+        return [self.add(item) for item in items]
+
+    def normalize(self, document: Dict[str, Any]) -> Related:
+        """Add the primary data and all included resources of a document.
+
+        Returns the primary resource(s) of the document.
+        """
+        self.add_all(document.get("included") or [])
+        data = document.get("data")
+        if isinstance(data, list):
+            return self.add_all(data)
+        return None if data is None else self.add(data)
+
+    def clear(self) -> None:
+        self._resources.clear()
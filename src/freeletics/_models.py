@@ -1,4 +1,5 @@
 import json
+import os
 import pathlib
 from collections.abc import MutableMapping
 from datetime import datetime, timezone
@@ -7,6 +8,18 @@ from typing import Any, Dict, List, Optional, Union
 import httpx
 import jwt
 
+from . import _json
+
+
+def write_text_atomic(file: pathlib.Path, data: str) -> None:
+    """Write a file, readers see either the old or the new content."""
+    tmp_file = file.with_name(f"{file.name}.{os.getpid()}.tmp")
+    with tmp_file.open("w") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, file)
+
 
 class BaseToken:
     def __init__(self, token: str) -> None:
@@ -152,7 +165,98 @@ class Credentials:
     def to_file(self, filename) -> None:
         file = pathlib.Path(filename)
         data = self.as_json()
-        file.write_text(data)
+        write_text_atomic(file, data)
+
+
+def get_activity_object(
+    item: Dict[str, Any], object_type: Optional[str] = "training"
+) -> Optional[Dict[str, Any]]:
+    """Return the activity object reference of an activity feed item."""
+    aod = item["relationships"]["activity_object"]["data"]
+    if aod is None or (object_type is not None and aod["type"] != object_type):
+        return None
+    return aod
+
+
+class FetchResult:
+    """Outcome of a single fetch in a bulk operation."""
+
+    def __init__(
+        self,
+        key: Union[str, int],
+        response: Optional["BaseResponseModel"] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self.key = key
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        state = "ok" if self.ok else repr(self.error)
+        return f"<FetchResult {self.key!r}: {state}>"
+
+
+class RawResponse:
+    """Undecoded response body together with the status code and the ETag.
+
+    `content` is `None`, if the body was streamed into a file, `size` is the
+    number of written bytes then.
+    """
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        content: Optional[bytes] = None,
+        size: Optional[int] = None,
+    ) -> None:
+        self._response = response
+        self.content = content
+        self.size = len(content) if size is None and content is not None else size
+
+    @property
+    def response(self) -> httpx.Response:
+        return self._response
+
+    @property
+    def request(self) -> httpx.Request:
+        return self._response.request
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self._response.headers.get("ETag")
+
+    def __repr__(self) -> str:
+        return f"<RawResponse [{self.status_code}] {self.size} bytes>"
+
+
+def decode_response(response: httpx.Response) -> Dict[str, Any]:
+    content = response.content
+    if not content:
+        return {}
+    try:
+        return _json.loads(content)
+    except ValueError:
+        return {}
+
+
+# headers which are kept by lean response models
+LEAN_HEADERS = ("ETag", "Date", "Last-Modified")
+
+
+def strip_response(response: httpx.Response) -> httpx.Response:
+    """Copy a response without its body, only `LEAN_HEADERS` are kept."""
+    headers = {k: response.headers[k] for k in LEAN_HEADERS if k in response.headers}
+    return httpx.Response(
+        response.status_code, headers=headers, request=response.request
+    )
 
 
 class BaseResponseModel(MutableMapping):
@@ -161,10 +265,49 @@ class BaseResponseModel(MutableMapping):
         data: Optional[Dict[str, Any]],
         response: httpx.Response,
         session: Union[httpx.Client, httpx.AsyncClient],
+        lean: bool = False,
     ) -> None:
-        self._data = data
+        """Wrap an API response.
+
+        If `data` is `None`, the response body is decoded on first access.
+        A `lean` model decodes the body at once and releases it.
+        """
+        self._decoded = data
         self._response = response
         self._session = session
+        self._lean = lean
+        if lean:
+            self.release_body()
+
+    def release_body(self) -> None:
+        """Decode the body and drop the raw response body.
+
+        Only the request, the status code and `LEAN_HEADERS` are kept, which
+        is enough for `etag` and `update_from_request`.
+        """
+        if self._decoded is None:
+            self._decoded = decode_response(self._response)
+        self._response = strip_response(self._response)
+
+    @property
+    def _data(self) -> Dict[str, Any]:
+        if self._decoded is None:
+            self._decoded = decode_response(self._response)
+        return self._decoded
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._decoded is not None
+
+    def _apply_response(self, response: httpx.Response) -> None:
+        # a 304 response has no body, the current response is kept
+        if response.status_code == 304:
+            return
+        self._response = response
+        if self._decoded is not None:
+            self.update(decode_response(response))
+        if self._lean:
+            self.release_body()
 
     def __getitem__(self, key):
         return self._data[self._keytransform(key)]
@@ -196,7 +339,16 @@ class BaseResponseModel(MutableMapping):
         return self._data
 
     def as_json(self, **options) -> str:
-        return json.dumps(self._data, default=lambda o: o.as_dict(), **options)
+        return _json.dumps(self._data, default=lambda o: o.as_dict(), **options)
+
+    def as_model(self, model_class):
+        """Convert the payload into a typed model, e.g. `PerformedActivity`.
+
+        If the body is not decoded yet, the decoded dict is not kept.
+        """
+        if self._decoded is None:
+            return model_class.from_dict(decode_response(self._response))
+        return model_class.from_dict(self._decoded)
 
     @property
     def etag(self) -> Optional[str]:
@@ -215,9 +367,7 @@ class CoreResponseModel(BaseResponseModel):
             headers = {"If-None-Match": self.etag}
             self.request.headers.update(headers)
         r = self._session.send(self.request)
-        self._response = r
-        if r.status_code != 304:
-            self.update(r.json())
+        self._apply_response(r)
         return self
 
 
@@ -230,7 +380,5 @@ class AsyncCoreResponseModel(BaseResponseModel):
             headers = {"If-None-Match": self.etag}
             self.request.headers.update(headers)
         r = await self._session.send(self.request)
-        self._response = r
-        if r.status_code != 304:
-            self.update(r.json())
+        self._apply_response(r)
         return self
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Optional
+
+from ._models import PaymentToken
+
+
+logger = logging.getLogger(__name__)
+
+# places of the token in a payment claims response
+PAYMENT_TOKEN_PATHS = (
+    ("payment_token",),
+    ("token",),
+    ("data", "payment_token"),
+    ("data", "token"),
+    ("data", "attributes", "payment_token"),
+    ("data", "attributes", "token"),
+)
+
+
+def extract_payment_token(data: Dict[str, Any]) -> str:
+    """Return the payment token of a payment claims response."""
+    for path in PAYMENT_TOKEN_PATHS:
+        value = data
+        for key in path:
+            if not isinstance(value, Mapping) or key not in value:
+                break
+            value = value[key]
+        else:
+            if isinstance(value, str):
+                return value
+    raise Exception("No payment token found in payment claims response")
+
+
+class PaymentTokenManager:
+    """Fetches, caches and renews the payment token of a client.
+
+    The token is requested with `get_payment_claims` on first use and
+    renewed `refresh_margin` seconds before it expires. Concurrent callers
+    share one claims request. A manager can be shared by clients of the
+    same user.
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = 300,
+        extract_token: Callable[[Dict[str, Any]], str] = extract_payment_token,
+    ) -> None:
+        self._refresh_margin = refresh_margin
+        self._extract_token = extract_token
+        self._token: Optional[PaymentToken] = None
+        self._sync_lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def token(self) -> Optional[PaymentToken]:
+        return self._token
+
+    def _needs_refresh(self) -> bool:
+        token = self._token
+        return token is None or token.expires_in_seconds <= self._refresh_margin
+
+    def _set_token(self, response, user_id: Optional[int]) -> PaymentToken:
+        self._token = PaymentToken(self._extract_token(response), user_id)
+        logger.debug(
+            "Got payment token, expires in %s seconds",
+            int(self._token.expires_in_seconds),
+        )
+        return self._token
+
+    def invalidate(self) -> None:
+        """Drop the cached token, e.g. after the subscription changed."""
+        self._token = None
+
+    def get_token(self, client) -> PaymentToken:
+        if not self._needs_refresh():
+            return self._token
+
+        with self._sync_lock:
+            if self._needs_refresh():
+                self._set_token(client.get_payment_claims(), client.user_id)
+            return self._token
+
+    async def async_get_token(self, client) -> PaymentToken:
+        if not self._needs_refresh():
+            return self._token
+
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if self._needs_refresh():
+                response = await client.get_payment_claims()
+                self._set_token(response, client.user_id)
+            return self._token
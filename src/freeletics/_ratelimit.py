@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS_CODES = (429, 503)
+# 5xx responses are retried by a `RetryPolicy`, the limiter only waits
+# and retries on 429
+LIMITER_RETRY_STATUS_CODES = (429,)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a `Retry-After` header value into seconds."""
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _wake_up(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveRateLimiter:
+    """Client side concurrency limiter which adapts to throttling responses.
+
+    The limit grows additively with every healthy response (about one slot
+    per round trip) and shrinks multiplicatively and/or additively, when the
+    server responds with a throttling status code. A `Retry-After` header
+    pauses all requests for the given time, `default_retry_after` is used
+    without the header. Only 429 responses are retried by the limiter, 503
+    responses are left to a `RetryPolicy`. One instance can be shared by
+    sync and async clients, also across threads.
+    """
+
+    def __init__(
+        self,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_step: float = 0.0,
+        default_retry_after: float = 1.0,
+        max_retries: int = 5,
+    ) -> None:
+        if not 1 <= min_concurrency <= initial_concurrency <= max_concurrency:
+            raise Exception(
+                "min_concurrency <= initial_concurrency <= max_concurrency "
+                "is required"
+            )
+
+        self._limit = float(initial_concurrency)
+        self._min_concurrency = min_concurrency
+        self._max_concurrency = max_concurrency
+        self._increase_step = increase_step
+        self._decrease_factor = decrease_factor
+        self._decrease_step = decrease_step
+        self._default_retry_after = default_retry_after
+        self.max_retries = max_retries
+
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _try_acquire(self) -> Optional[float]:
+        """Take a slot and return `0`, a delay in seconds or `None`.
+
+        `None` means that all slots are in use. Must be called with the lock.
+        """
+        delay = self._blocked_until - time.monotonic()
+        if delay > 0:
+            return delay
+        if self._in_flight < self.limit:
+            self._in_flight += 1
+            return 0
+        return None
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                delay = self._try_acquire()
+                if delay == 0:
+                    return
+                self._cond.wait(timeout=delay)
+
+    async def async_acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = None
+            with self._cond:
+                delay = self._try_acquire()
+                if delay == 0:
+                    return
+                if delay is None:
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+
+            if waiter is None:
+                await asyncio.sleep(delay)
+            else:
+                await waiter
+
+    def release(
+        self, status_code: Optional[int] = None, retry_after: Optional[str] = None
+    ) -> None:
+        """Free a slot and adapt the limit to the response status code.
+
+        Use `None` as `status_code`, if the request failed without response.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if status_code in THROTTLE_STATUS_CODES:
+                self._on_throttled(status_code, parse_retry_after(retry_after))
+            elif status_code is not None and status_code < 500:
+                self._limit = min(
+                    self._limit + self._increase_step / self._limit,
+                    self._max_concurrency,
+                )
+
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake_up, waiter)
+
+    def _on_throttled(self, status_code: int, retry_after: Optional[float]) -> None:
+        if retry_after is None:
+            retry_after = self._default_retry_after
+
+        now = time.monotonic()
+        # responses of requests sent before the first throttling response
+        # must not shrink the limit again
+        if now >= self._blocked_until:
+            self._limit = max(
+                self._limit * self._decrease_factor - self._decrease_step,
+                self._min_concurrency,
+            )
+            logger.info("Throttled by server, reduce concurrency to %s", self.limit)
+        self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def should_retry(self, status_code: int, attempt: int) -> bool:
+        return status_code in LIMITER_RETRY_STATUS_CODES and attempt < self.max_retries
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from ._ratelimit import parse_retry_after
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class RetryStats:
+    """Counters about the retries done by a `RetryPolicy`."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.budget_exhausted = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "budget_exhausted": self.budget_exhausted,
+        }
+
+    def __repr__(self) -> str:
+        return f"<RetryStats {self.as_dict()}>"
+
+
+class RetryPolicy:
+    """Retry failed idempotent requests with exponential backoff and jitter.
+
+    Requests are retried on transport errors (connection errors, timeouts)
+    and on the given status codes. The retry budget allows at most
+    `min_retries + budget_ratio * requests` retries over the lifetime of
+    the policy, so a failing server is not hammered with retries. Use one
+    policy per client.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: bool = True,
+        status_codes: Iterable[int] = RETRY_STATUS_CODES,
+        methods: Iterable[str] = IDEMPOTENT_METHODS,
+        budget_ratio: Optional[float] = 0.2,
+        min_retries: int = 10,
+        retry_token_refresh: bool = False,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = frozenset(status_codes)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.budget_ratio = budget_ratio
+        self.min_retries = min_retries
+        self.retry_token_refresh = retry_token_refresh
+        self.stats = RetryStats()
+        self._lock = threading.Lock()
+
+    def get_backoff(
+        self, attempt: int, response: Optional[httpx.Response] = None
+    ) -> float:
+        delay = min(self.backoff_factor * 2**attempt, self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)  # noqa: S311
+
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    def _withdraw_budget(self) -> bool:
+        with self._lock:
+            if self.budget_ratio is not None:
+                budget = self.min_retries + self.budget_ratio * self.stats.requests
+                if self.stats.retries >= budget:
+                    self.stats.budget_exhausted += 1
+                    return False
+            self.stats.retries += 1
+            return True
+
+    def should_retry(
+        self,
+        request: httpx.Request,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+        force: bool = False,
+    ) -> bool:
+        """Decide if a request is retried after a failed attempt.
+
+        Use `force` for requests which are known to be safe to repeat, even
+        if the method is not idempotent (e.g. the token refresh).
+        """
+        if response is not None and response.status_code not in self.status_codes:
+            return False
+        if not force and request.method not in self.methods:
+            return False
+        if attempt >= self.max_retries or not self._withdraw_budget():
+            with self._lock:
+                self.stats.gave_up += 1
+            return False
+        return True
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self.stats.requests += 1
+
+    def send(
+        self,
+        send: Callable[..., httpx.Response],
+        request: httpx.Request,
+        force: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        self._count_request()
+        attempt = 0
+        while True:
+            try:
+                r = send(request, **kwargs)
+            except httpx.TransportError as exc:
+                if not self.should_retry(request, attempt, force=force):
+                    raise
+                r = None
+                logger.debug("Retry %s after error: %s", request.url, exc)
+            else:
+                if not self.should_retry(request, attempt, r, force=force):
+                    return r
+                r.close()
+                logger.debug("Retry %s after status %s", request.url, r.status_code)
+
+            time.sleep(self.get_backoff(attempt, r))
+            attempt += 1
+
+    async def async_send(
+        self,
+        send: Callable[..., Awaitable[httpx.Response]],
+        request: httpx.Request,
+        force: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        self._count_request()
+        attempt = 0
+        while True:
+            try:
+                r = await send(request, **kwargs)
+            except httpx.TransportError as exc:
+                if not self.should_retry(request, attempt, force=force):
+                    raise
+                r = None
+                logger.debug("Retry %s after error: %s", request.url, exc)
+            else:
+                if not self.should_retry(request, attempt, r, force=force):
+                    return r
+                await r.aclose()
+                logger.debug("Retry %s after status %s", request.url, r.status_code)
+
+            await asyncio.sleep(self.get_backoff(attempt, r))
+            attempt += 1
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import threading
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs a function only once for all concurrent calls with the same key.
+
+    The first caller (the leader) runs the function, all callers which
+    arrive before it finishes wait and share its result or exception.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            logger.debug("Join in-flight call %s", key)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """Asyncio version of `SingleFlight`."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is not None:
+            logger.debug("Join in-flight call %s", key)
+        else:
+            # the call runs in its own task, so cancelling the leader does not
+            # cancel the call the other callers wait for
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(partial(self._done, key))
+        # a cancelled caller must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # mark the exception as retrieved, if nobody waits for it
+            task.exception()
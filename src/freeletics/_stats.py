@@ -0,0 +1,202 @@
+"""Vectorized training statistics.
+
+All functions work on the structured arrays created by `activities_to_numpy`.
+The `by` argument groups the results by one or more columns, e.g.
+`("user_id", "workout_slug")` computes the statistics for many users at once.
+"""
+
+from datetime import date
+from typing import Optional, Sequence, Tuple
+
+from ._columnar import _require_numpy
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+SECONDS_PER_DAY = 86400
+
+
+def _group(array: "np.ndarray", by: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Return the unique group keys and the group index of every row."""
+    if not by:
+        # one group for all rows, no group without rows
+        keys = np.zeros(min(len(array), 1), dtype=[("group", np.int8)])
+        return keys, np.zeros(len(array), dtype=np.intp)
+    keys, inverse = np.unique(array[list(by)], return_inverse=True)
+    return keys, inverse.reshape(-1)
+
+
+def _result(keys: "np.ndarray", by: Sequence[str], **columns) -> "np.ndarray":
+    dtype = [(name, keys.dtype[name]) for name in by]
+    dtype += [(name, values.dtype) for name, values in columns.items()]
+    result = np.empty(len(keys), dtype=dtype)
+    for name in by:
+        result[name] = keys[name]
+    for name, values in columns.items():
+        result[name] = values
+    return result
+
+
+def _days(array: "np.ndarray") -> "np.ndarray":
+    """Days since epoch of the completion time, -1 if unknown."""
+    completed_at = array["completed_at"]
+    days = completed_at.astype("datetime64[D]").astype(np.int64)
+    return np.where(np.isnat(completed_at), -1, days)
+
+
+def personal_bests(
+    array: "np.ndarray",
+    value: str = "duration",
+    lower_is_better: bool = True,
+    by: Sequence[str] = ("workout_slug",),
+) -> "np.ndarray":
+    """Best value and number of activities per group.
+
+    `index` is the row of the best activity, rows with a missing value are
+    ignored.
+    """
+    _require_numpy()
+    keys, inverse = _group(array, by)
+    values = array[value].astype(np.float64)
+    valid = ~np.isnan(values)
+    sort_values = values if lower_is_better else -values
+
+    rows = np.flatnonzero(valid)
+    order = rows[np.lexsort((sort_values[rows], inverse[rows]))]
+    groups = inverse[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = groups[1:] != groups[:-1]
+
+    index = np.full(len(keys), -1, dtype=np.int64)
+    index[groups[first]] = order[first]
+    best = np.full(len(keys), np.nan)
+    found = index >= 0
+    best[found] = values[index[found]]
+    count = np.bincount(inverse, minlength=len(keys))
+    return _result(keys, by, best=best, index=index, count=count)
+
+
+def weekly_volume(
+    array: "np.ndarray", value: str = "duration", by: Sequence[str] = ()
+) -> "np.ndarray":
+    """Sum of `value` and number of activities per group and ISO week.
+
+    `week` is the monday of the week.
+    """
+    _require_numpy()
+    days = _days(array)
+    known = days >= 0
+    array, days = array[known], days[known]
+    # 1970-01-01 was a thursday, shift every day to the monday of its week
+    mondays = days - (days + 3) % 7
+
+    fields = [(name, array.dtype[name]) for name in by]
+    week_array = np.empty(len(array), dtype=[*fields, ("week", "datetime64[D]")])
+    for name in by:
+        week_array[name] = array[name]
+    week_array["week"] = mondays.astype("datetime64[D]")
+    keys, inverse = _group(week_array, (*by, "week"))
+
+    values = np.nan_to_num(array[value].astype(np.float64))
+    total = np.bincount(inverse, weights=values, minlength=len(keys))
+    count = np.bincount(inverse, minlength=len(keys))
+    return _result(keys, (*by, "week"), total=total, count=count)
+
+
+def rolling_average(values: "np.ndarray", window: int) -> "np.ndarray":
+    """Rolling mean over the last `window` values, `NaN` values are skipped.
+
+    The first values are averaged over the available values.
+    """
+    _require_numpy()
+    if window < 1:
+        raise Exception("window must be at least 1")
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0))
+    counts = np.cumsum(valid)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def completion_streaks(
+    array: "np.ndarray", by: Sequence[str] = (), today: Optional[date] = None
+) -> "np.ndarray":
+    """Longest and current streak of consecutive training days per group.
+
+    The current streak counts, if the last training day is today or
+    yesterday.
+    """
+    _require_numpy()
+    keys, inverse = _group(array, by)
+    days = _days(array)
+    known = days >= 0
+    longest = np.zeros(len(keys), dtype=np.int64)
+    current = np.zeros(len(keys), dtype=np.int64)
+    if not known.any():
+        return _result(keys, by, longest=longest, current=current)
+
+    # unique training days per group, sorted by group and day
+    pairs = np.unique(np.stack([inverse[known], days[known]], axis=1), axis=0)
+    groups, days = pairs[:, 0], pairs[:, 1]
+
+    # a new run starts, if the group changes or a day was skipped
+    starts = np.ones(len(days), dtype=bool)
+    starts[1:] = (groups[1:] != groups[:-1]) | (days[1:] - days[:-1] != 1)
+    run_ids = np.cumsum(starts) - 1
+    run_lengths = np.bincount(run_ids)
+    run_groups = groups[starts]
+    run_last_day = days[np.r_[np.flatnonzero(starts)[1:] - 1, len(days) - 1]]
+
+    np.maximum.at(longest, run_groups, run_lengths)
+
+    today_days = np.datetime64(today or date.today(), "D").astype(np.int64)
+    active = run_last_day >= today_days - 1
+    # the last run of a group is the only one which can be active
+    np.maximum.at(current, run_groups[active], run_lengths[active])
+    return _result(keys, by, longest=longest, current=current)
+
+
+def time_per_round(array: "np.ndarray") -> "np.ndarray":
+    """Duration per round of every activity, `NaN` if unknown."""
+    _require_numpy()
+    rounds = array["rounds"].astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(rounds > 0, array["duration"] / rounds, np.nan)
+
+
+def time_per_round_trend(
+    array: "np.ndarray", by: Sequence[str] = ("workout_slug",)
+) -> "np.ndarray":
+    """Linear trend of the time per round per group.
+
+    `slope` is the change of seconds per round per day (negative means
+    getting faster), computed with least squares for all groups at once.
+    """
+    _require_numpy()
+    keys, inverse = _group(array, by)
+    y = time_per_round(array)
+    x = array["completed_at"].astype("datetime64[s]").astype(np.float64)
+    x = x / SECONDS_PER_DAY
+    valid = ~np.isnan(y) & ~np.isnat(array["completed_at"])
+    inverse, x, y = inverse[valid], x[valid], y[valid]
+
+    size = len(keys)
+    n = np.bincount(inverse, minlength=size).astype(np.float64)
+    # center x to keep the sums numerical stable
+    x = x - x.mean() if len(x) else x
+    sx = np.bincount(inverse, weights=x, minlength=size)
+    sy = np.bincount(inverse, weights=y, minlength=size)
+    sxx = np.bincount(inverse, weights=x * x, minlength=size)
+    sxy = np.bincount(inverse, weights=x * y, minlength=size)
+    denominator = n * sxx - sx * sx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+        mean = np.where(n > 0, sy / n, np.nan)
+    return _result(keys, by, slope=slope, mean=mean, count=n.astype(np.int64))
@@ -0,0 +1,297 @@
+import logging
+import pathlib
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from . import _json
+from ._columnar import DEFAULT_ACTIVITY_COLUMNS, ActivityColumn
+from ._export import _encode_record
+from ._models import BaseResponseModel
+
+
+logger = logging.getLogger(__name__)
+
+Payload = Union[BaseResponseModel, Dict[str, Any]]
+DateLike = Union[date, datetime, str, int]
+
+_ACTIVITY_COLUMNS = {c.name: c for c in DEFAULT_ACTIVITY_COLUMNS}
+_ACTIVITY_COLUMNS["activity_type"] = ActivityColumn(
+    "activity_type",
+    [
+        "performed_activity.activity_type",
+        "performed_activity.activity.type",
+        "activity_type",
+    ],
+    "str",
+)
+_PLANNED_COLUMNS = {
+    c.name: c
+    for c in (
+        ActivityColumn("id", ["planned_activity.id", "id"], "int"),
+        ActivityColumn("user_id", ["planned_activity.user_id", "user_id"], "int"),
+        ActivityColumn(
+            "planned_at",
+            [
+                "planned_activity.planned_at",
+                "planned_activity.date",
+                "planned_at",
+                "date",
+            ],
+            "datetime",
+        ),
+        ActivityColumn(
+            "workout_slug",
+            [
+                "planned_activity.workout_slug",
+                "planned_activity.activity.slug",
+                "workout_slug",
+            ],
+            "str",
+        ),
+        ActivityColumn(
+            "activity_type",
+            [
+                "planned_activity.activity_type",
+                "planned_activity.activity.type",
+                "activity_type",
+            ],
+            "str",
+        ),
+    )
+}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS activities ("
+    "id INTEGER PRIMARY KEY, user_id INTEGER, completed_at INTEGER, "
+    "workout_slug TEXT, activity_type TEXT, duration REAL, points REAL, "
+    "data BLOB)",
+    "CREATE INDEX IF NOT EXISTS activities_user "
+    "ON activities (user_id, completed_at)",
+    "CREATE INDEX IF NOT EXISTS activities_completed_at "
+    "ON activities (completed_at)",
+    "CREATE INDEX IF NOT EXISTS activities_workout "
+    "ON activities (workout_slug, completed_at)",
+    "CREATE INDEX IF NOT EXISTS activities_type "
+    "ON activities (activity_type, completed_at)",
+    "CREATE TABLE IF NOT EXISTS planned_activities ("
+    "id INTEGER PRIMARY KEY, user_id INTEGER, planned_at INTEGER, "
+    "workout_slug TEXT, activity_type TEXT, data BLOB)",
+    "CREATE INDEX IF NOT EXISTS planned_activities_user "
+    "ON planned_activities (user_id, planned_at)",
+    "CREATE INDEX IF NOT EXISTS planned_activities_workout "
+    "ON planned_activities (workout_slug, planned_at)",
+    "CREATE TABLE IF NOT EXISTS calendar_days ("
+    "user_id INTEGER, day TEXT, data BLOB, PRIMARY KEY (user_id, day))",
+)
+
+ORDER_COLUMNS = ("completed_at", "duration", "points", "id")
+
+
+def _to_timestamp(value: DateLike) -> int:
+    """Convert a date, datetime, ISO string or timestamp to seconds (UTC)."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _to_day(value: Union[date, str]) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value[:10]
+
+
+def _extract(columns: Dict[str, ActivityColumn], item: Payload) -> Dict[str, Any]:
+    data = item.as_dict() if isinstance(item, BaseResponseModel) else item
+    return {name: column.extract(data) for name, column in columns.items()}
+
+
+def _range(
+    column: str, start: Optional[DateLike], end: Optional[DateLike]
+) -> Tuple[List[str], List[Any]]:
+    where, params = [], []
+    if start is not None:
+        where.append(f"{column} >= ?")
+        params.append(_to_timestamp(start))
+    if end is not None:
+        where.append(f"{column} < ?")
+        params.append(_to_timestamp(end))
+    return where, params
+
+
+class ActivityStore:
+    """Local SQLite store for activities, planned activities and calendar days.
+
+    The raw payloads are stored together with indexed columns (user id,
+    date, workout slug and activity type), so queries are answered without
+    parsing all stored payloads or requesting the API.
+    """
+
+    def __init__(self, filename: Union[str, pathlib.Path] = ":memory:") -> None:
+        self._filename = filename
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(filename), check_same_thread=False)
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def __enter__(self) -> "ActivityStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add_activities(self, items: Iterable[Payload]) -> int:
+        """Insert or replace performed activities, returns the number of rows."""
+        rows = []
+        for item in items:
+            values = _extract(_ACTIVITY_COLUMNS, item)
+            if values["id"] is None:
+                logger.warning("Skip activity without id")
+                continue
+            rows.append(
+                (
+                    values["id"],
+                    values["user_id"],
+                    values["completed_at"],
+                    values["workout_slug"],
+                    values["activity_type"],
+                    values["duration"],
+                    values["points"],
+                    _encode_record(item),
+                )
+            )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO activities VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def add_activity(self, item: Payload) -> None:
+        self.add_activities([item])
+
+    def add_planned_activities(self, items: Iterable[Payload]) -> int:
+        rows = []
+        for item in items:
+            values = _extract(_PLANNED_COLUMNS, item)
+            if values["id"] is None:
+                logger.warning("Skip planned activity without id")
+                continue
+            rows.append(
+                (
+                    values["id"],
+                    values["user_id"],
+                    values["planned_at"],
+                    values["workout_slug"],
+                    values["activity_type"],
+                    _encode_record(item),
+                )
+            )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO planned_activities VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def add_calendar_day(
+        self, day: Union[date, str], item: Payload, user_id: Optional[int] = None
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO calendar_days VALUES (?, ?, ?)",
+                (user_id, _to_day(day), _encode_record(item)),
+            )
+
+    def _select(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_json.loads(row[0]) for row in rows]
+
+    def get_activity(self, activity_id: Union[str, int]) -> Optional[Dict[str, Any]]:
+        result = self._select(
+            "SELECT data FROM activities WHERE id = ?", [int(activity_id)]
+        )
+        return result[0] if result else None
+
+    def query_activities(
+        self,
+        user_id: Optional[int] = None,
+        workout_slug: Optional[str] = None,
+        activity_type: Optional[str] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        order_by: str = "completed_at",
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return stored performed activities matching all given filters.
+
+        `start` is inclusive, `end` is exclusive.
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise Exception(f"order_by must be one of {', '.join(ORDER_COLUMNS)}")
+
+        where, params = _range("completed_at", start, end)
+        for column, value in (
+            ("user_id", user_id),
+            ("workout_slug", workout_slug),
+            ("activity_type", activity_type),
+        ):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+
+        sql = "SELECT data FROM activities"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._select(sql, params)
+
+    def query_planned_activities(
+        self,
+        user_id: Optional[int] = None,
+        workout_slug: Optional[str] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> List[Dict[str, Any]]:
+        where, params = _range("planned_at", start, end)
+        for column, value in (("user_id", user_id), ("workout_slug", workout_slug)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+
+        sql = "SELECT data FROM planned_activities"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._select(sql + " ORDER BY planned_at, id", params)
+
+    def get_calendar_day(
+        self, day: Union[date, str], user_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        result = self._select(
+            "SELECT data FROM calendar_days WHERE user_id IS ? AND day = ?",
+            [user_id, _to_day(day)],
+        )
+        return result[0] if result else None
+
+    def count_activities(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,221 @@
+import json
+import logging
+import pathlib
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ._aggregates import ActivityAggregates
+from ._models import (
+    AsyncCoreResponseModel,
+    CoreResponseModel,
+    get_activity_object,
+    write_text_atomic,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyncState:
+    """Remembers which activities were already fetched.
+
+    Activities are stored with their completion timestamp. Activities which
+    could not be fetched are kept as pending and retried on the next run.
+    Optional `aggregates` are updated with every synced activity and stored
+    together with the state.
+    """
+
+    def __init__(
+        self,
+        activities: Optional[Dict[str, Optional[str]]] = None,
+        pending: Optional[Dict[str, Optional[str]]] = None,
+        aggregates: Optional[ActivityAggregates] = None,
+    ) -> None:
+        self._activities = dict(activities or {})
+        self._pending = dict(pending or {})
+        self.aggregates = aggregates
+        timestamps = [i for i in self._activities.values() if i is not None]
+        self._high_water_mark = max(timestamps) if timestamps else None
+
+    def __len__(self) -> int:
+        return len(self._activities)
+
+    def is_known(self, activity_id: Union[str, int]) -> bool:
+        return str(activity_id) in self._activities
+
+    def add(self, activity_id: Union[str, int], completed_at: Optional[str]) -> None:
+        activity_id = str(activity_id)
+        self._pending.pop(activity_id, None)
+        self._activities[activity_id] = completed_at
+        if completed_at is not None and (
+            self._high_water_mark is None or completed_at > self._high_water_mark
+        ):
+            self._high_water_mark = completed_at
+
+    def add_pending(
+        self, activity_id: Union[str, int], completed_at: Optional[str]
+    ) -> None:
+        self._pending[str(activity_id)] = completed_at
+
+    @property
+    def pending(self) -> Dict[str, Optional[str]]:
+        return dict(self._pending)
+
+    @property
+    def high_water_mark(self) -> Optional[str]:
+        return self._high_water_mark
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SyncState":
+        aggregates = data.get("aggregates")
+        if aggregates is not None:
+            aggregates = ActivityAggregates.from_dict(aggregates)
+        return cls(
+            activities=data["activities"],
+            pending=data.get("pending"),
+            aggregates=aggregates,
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {"activities": self._activities, "pending": self._pending}
+        if self.aggregates is not None:
+            data["aggregates"] = self.aggregates.as_dict()
+        return data
+
+    @classmethod
+    def from_json(cls, data) -> "SyncState":
+        data = json.loads(data)
+        return cls.from_dict(data)
+
+    def as_json(self, **options) -> str:
+        return json.dumps(self.as_dict(), **options)
+
+    @classmethod
+    def from_file(cls, filename: str) -> "SyncState":
+        file = pathlib.Path(filename)
+        data = file.read_text()
+        return cls.from_json(data)
+
+    def to_file(self, filename) -> None:
+        file = pathlib.Path(filename)
+        data = self.as_json()
+        write_text_atomic(file, data)
+
+
+class BaseActivitySync:
+    def __init__(
+        self,
+        client,
+        state: SyncState,
+        user_id: Optional[Union[str, int]] = None,
+        activity_type: str = "training_completed",
+        object_type: str = "training",
+        concurrency: int = 10,
+    ) -> None:
+        self._client = client
+        self._state = state
+        self._user_id = user_id
+        self._activity_type = activity_type
+        self._object_type = object_type
+        self._concurrency = concurrency
+
+    @property
+    def state(self) -> SyncState:
+        return self._state
+
+    @staticmethod
+    def _completed_at(item: Dict[str, Any]) -> Optional[str]:
+        attributes = item.get("attributes") or {}
+        return attributes.get("completed_at") or attributes.get("created_at")
+
+    def _process_feed_item(
+        self, item: Dict[str, Any], new: Dict[str, Optional[str]]
+    ) -> bool:
+        """Add a new activity from the feed and return `False` to stop paging.
+
+        The activity feed is sorted from newest to oldest, paging stops at the
+        first known activity. New activities are stored as pending before they
+        are fetched, so an interrupted run is resumed by the next run.
+        """
+        aod = get_activity_object(item, self._object_type)
+        if aod is None:
+            return True
+
+        activity_id = str(aod["id"])
+        if self._state.is_known(activity_id):
+            return False
+
+        completed_at = self._completed_at(item)
+        self._state.add_pending(activity_id, completed_at)
+        new[activity_id] = completed_at
+        return True
+
+    def _process_result(self, result, new: Dict[str, Optional[str]]) -> bool:
+        completed_at = new[str(result.key)]
+        if result.ok:
+            self._state.add(result.key, completed_at)
+            if self._state.aggregates is not None:
+                self._state.aggregates.add(result.response)
+            return True
+
+        logger.warning("Could not sync activity %s: %s", result.key, result.error)
+        self._state.add_pending(result.key, completed_at)
+        return False
+
+
+class ActivitySync(BaseActivitySync):
+    """Fetch only activities which are not known by the sync state."""
+
+    def find_new(self) -> List[Tuple[str, Optional[str]]]:
+        new = self._state.pending
+        activities = self._client.iter_user_activities(
+            user_id=self._user_id, activity_type=self._activity_type
+        )
+        for item in activities:
+            if not self._process_feed_item(item, new):
+                activities.close()
+                break
+        return list(new.items())
+
+    def run(self) -> Iterator[CoreResponseModel]:
+        new = dict(self.find_new())
+        logger.info("Found %s new activities", len(new))
+        results = self._client.fetch_many(
+            new, concurrency=self._concurrency, ordered=True
+        )
+        for result in results:
+            if self._process_result(result, new):
+                yield result.response
+
+
+class AsyncActivitySync(BaseActivitySync):
+    """Fetch only activities which are not known by the sync state."""
+
+    async def find_new(self) -> List[Tuple[str, Optional[str]]]:
+        new = self._state.pending
+        activities = self._client.iter_user_activities(
+            user_id=self._user_id, activity_type=self._activity_type
+        )
+        async for item in activities:
+            if not self._process_feed_item(item, new):
+                await activities.aclose()
+                break
+        return list(new.items())
+
+    async def run(self) -> AsyncIterator[AsyncCoreResponseModel]:
+        new = dict(await self.find_new())
+        logger.info("Found %s new activities", len(new))
+        results = self._client.fetch_many(
+            new, concurrency=self._concurrency, ordered=True
+        )
+        async for result in results:
+            if self._process_result(result, new):
+                yield result.response
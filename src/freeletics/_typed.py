@@ -0,0 +1,139 @@
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar, Union
+
+from . import _json
+
+
+T = TypeVar("T", bound="TypedModel")
+
+
+class TypedModel:
+    """Compact model with one slot per known field.
+
+    Known fields are stored in slots, all other keys of the payload are kept
+    in `extra`, so `as_dict` returns the payload again. Fields which are
+    missing in the payload leave their slot unset and read as `None`, fields
+    which are `null` in the payload stay `None` in `as_dict`. `ROOT` is the
+    key which wraps the payload in API responses, e.g.
+    `{"performed_activity": {...}, "meta": {...}}`, the other keys of the
+    wrapper are kept in `wrapper`.
+    """
+
+    __slots__ = ("extra", "wrapper")
+    FIELDS: Tuple[str, ...] = ()
+    ROOT: Optional[str] = None
+
+    def __init__(
+        self,
+        extra: Optional[Dict[str, Any]] = None,
+        wrapper: Optional[Dict[str, Any]] = None,
+        **fields,
+    ) -> None:
+        unknown = [name for name in fields if name not in self.FIELDS]
+        if unknown:
+            raise TypeError(f"Unknown fields: {', '.join(unknown)}")
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.extra = extra or {}
+        self.wrapper = wrapper or {}
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for unset slots, i.e. fields missing in the payload
+        if name in self.FIELDS:
+            return None
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    @classmethod
+    def from_dict(cls: Type[T], data: Dict[str, Any]) -> T:
+        wrapper = None
+        if cls.ROOT is not None and cls.ROOT in data:
+            wrapper = {k: v for k, v in data.items() if k != cls.ROOT}
+            data = data[cls.ROOT]
+        fields = {}
+        extra = {}
+        for key, value in data.items():
+            if key in cls.FIELDS:
+                fields[key] = value
+            else:
+                extra[key] = value
+        return cls(extra=extra, wrapper=wrapper, **fields)
+
+    @classmethod
+    def from_json(cls: Type[T], data: Union[str, bytes]) -> T:
+        return cls.from_dict(_json.loads(data))
+
+    def _fields(self) -> Dict[str, Any]:
+        fields = {}
+        for name in self.FIELDS:
+            try:
+                fields[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                continue
+        return fields
+
+    def as_dict(self, wrapped: bool = False) -> Dict[str, Any]:
+        """Return the payload, with `wrapped` inside its `ROOT` key."""
+        data = self._fields()
+        data.update(self.extra)
+        if wrapped and self.ROOT is not None:
+            return {self.ROOT: data, **self.wrapper}
+        return data
+
+    def as_json(self, wrapped: bool = False, **options) -> str:
+        return _json.dumps(self.as_dict(wrapped), **options)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.as_dict(wrapped=True) == other.as_dict(wrapped=True)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={value!r}" for name, value in self._fields().items()
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class PerformedActivity(TypedModel):
+    FIELDS = (
+        "id",
+        "user_id",
+        "workout_slug",
+        "completed_at",
+        "duration",
+        "points",
+        "is_personal_best",
+    )
+    __slots__ = FIELDS
+    ROOT = "performed_activity"
+
+
+class PlannedActivity(TypedModel):
+    FIELDS = ("id", "user_id", "workout_slug", "activity_type", "planned_at")
+    __slots__ = FIELDS
+    ROOT = "planned_activity"
+
+
+class CalendarDay(TypedModel):
+    FIELDS = ("date", "training_day", "planned_activities")
+    __slots__ = FIELDS
+    ROOT = "calendar_day"
+
+
+class CoachWorkout(TypedModel):
+    FIELDS = ("slug", "title", "category_slug", "duration", "exercises")
+    __slots__ = FIELDS
+    ROOT = "workout"
+
+
+class CoachExercise(TypedModel):
+    FIELDS = ("slug", "title", "category_slug", "equipment")
+    __slots__ = FIELDS
+    ROOT = "exercise"
+
+
+class UserProfile(TypedModel):
+    FIELDS = ("id", "fl_uid", "first_name", "last_name", "gender", "locale")
+    __slots__ = FIELDS
+    ROOT = "user"
@@ -0,0 +1,17 @@
+import time
+
+import jwt
+import pytest
+
+
+@pytest.fixture
+def make_id_token():
+    def make(expires_in=3600, user_id=1):
+        payload = {
+            "aud": ["standard"],
+            "user_id": user_id,
+            "exp": time.time() + expires_in,
+        }
+        return jwt.encode(payload, "secret" * 8, algorithm="HS256")
+
+    return make
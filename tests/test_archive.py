@@ -0,0 +1,51 @@
+import httpx
+import pytest
+
+from freeletics import ActivityArchive, FetchResult
+from freeletics._models import CoreResponseModel, RawResponse
+
+
+def test_archive_add_and_lookup(tmp_path):
+    filename = tmp_path / "activities.archive"
+    response = httpx.Response(200, content=b'{"performed_activity": {"id": 1}}')
+    results = [
+        FetchResult(1, response=CoreResponseModel(None, response, None)),
+        FetchResult(2, error=Exception("failed")),
+    ]
+
+    with ActivityArchive(filename, mode="a") as archive:
+        assert archive.add_results(results) == 1
+        # enough records to grow the index several times
+        for i in range(2, 3000):
+            archive.add(i, {"performed_activity": {"id": i}})
+        archive.add(5, {"performed_activity": {"id": 5, "points": 10}})
+
+    with ActivityArchive(filename) as archive:
+        assert archive.compression == "zlib"
+        assert len(archive) == 2999
+        assert archive.get_raw(1) == b'{"performed_activity": {"id": 1}}'
+        assert archive.get(2999) == {"performed_activity": {"id": 2999}}
+        assert archive.get("5")["performed_activity"]["points"] == 10
+        assert 3000 not in archive
+        assert archive.get(3000) is None
+        with pytest.raises(Exception, match="read-only"):
+            archive.add(3000, b"{}")
+
+
+def test_archive_rejects_records_without_body(tmp_path):
+    filename = tmp_path / "activities.archive"
+    streamed = RawResponse(httpx.Response(200, content=b"{}"), content=None)
+    results = [
+        FetchResult(1, response=streamed),
+        FetchResult(2, response=RawResponse(httpx.Response(200), content=b"")),
+        FetchResult(3, response=b'{"performed_activity": {"id": 3}}'),
+    ]
+
+    with ActivityArchive(filename, mode="a", compression="none") as archive:
+        with pytest.raises(ValueError, match="streamed"):
+            archive.add(1, streamed)
+        with pytest.raises(ValueError, match="empty"):
+            archive.add(2, b"")
+        assert archive.add_results(results) == 1
+        assert len(archive) == 1
+        assert 2 not in archive
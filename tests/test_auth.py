@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from freeletics._api import ApiRequestBuilder
+from freeletics._auth import FreeleticsAuth
+from freeletics._credential_store import SharedCredentialStore
+from freeletics._models import Credentials, IdToken, RefreshToken
+
+
+def test_background_refresh_renews_token_ahead_of_expiry(make_id_token):
+    refreshed = make_id_token(3600)
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/user/v1/auth/refresh":
+            return httpx.Response(201, json={"auth": {"id_token": refreshed}})
+        return httpx.Response(200, json={})
+
+    session = httpx.Client(transport=httpx.MockTransport(handler))
+    session.auth = auth = FreeleticsAuth(
+        id_token=IdToken(make_id_token(120)),
+        refresh_token=RefreshToken("refresh", 1),
+        session=session,
+        api_request_builder=ApiRequestBuilder(session),
+        background_refresh=True,
+        refresh_margin=300,
+    )
+
+    # the current token is still valid, the request does not wait for a refresh
+    session.get("https://api.freeletics.com/v4/profile")
+    for _ in range(100):
+        if auth.id_token.token == refreshed:
+            break
+        time.sleep(0.01)
+    auth.stop_background_refresh()
+
+    assert auth.id_token.token == refreshed
+    assert calls.count("/user/v1/auth/refresh") == 1
+
+
+def _refresh_calls(refresh_response, id_token, refresh_margin):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return refresh_response()
+
+    session = httpx.Client(transport=httpx.MockTransport(handler))
+    auth = FreeleticsAuth(
+        id_token=IdToken(id_token),
+        refresh_token=RefreshToken("refresh", 1),
+        session=session,
+        api_request_builder=ApiRequestBuilder(session),
+        background_refresh=True,
+        refresh_margin=refresh_margin,
+    )
+    auth._start_sync_refresher()
+    time.sleep(0.3)
+    auth.stop_background_refresh()
+    return calls
+
+
+def test_background_refresh_of_short_lived_tokens_does_not_spin(make_id_token):
+    # new tokens live shorter than the refresh margin
+    calls = _refresh_calls(
+        lambda: httpx.Response(201, json={"auth": {"id_token": make_id_token(2)}}),
+        make_id_token(120),
+        refresh_margin=300,
+    )
+    assert calls == ["/user/v1/auth/refresh"]
+
+    # failing refreshes without a margin
+    calls = _refresh_calls(lambda: httpx.Response(500), make_id_token(-1), 0)
+    assert calls == ["/user/v1/auth/refresh"]
+
+
+def test_credential_store_shares_refreshed_token(tmp_path, make_id_token):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(201, json={"auth": {"id_token": make_id_token(3600)}})
+
+    store = SharedCredentialStore(tmp_path / "credentials.json")
+    store.save(Credentials(make_id_token(5), "refresh", 1))
+
+    auths = []
+    for _ in range(2):
+        session = httpx.Client(transport=httpx.MockTransport(handler))
+        credentials = store.load()
+        auths.append(
+            FreeleticsAuth(
+                id_token=credentials.id_token,
+                refresh_token=credentials.refresh_token,
+                session=session,
+                api_request_builder=ApiRequestBuilder(session),
+                credential_store=store,
+            )
+        )
+
+    for auth in auths:
+        auth.sync_update_id_token()
+
+    # the second worker picks up the token refreshed by the first worker
+    assert calls == ["/user/v1/auth/refresh"]
+    assert auths[0].id_token.token == auths[1].id_token.token
+    assert store.load().id_token.token == auths[0].id_token.token
+
+
+def test_cancelled_async_lock_is_released(tmp_path):
+    store = SharedCredentialStore(tmp_path / "credentials.json", poll_interval=0.01)
+
+    async def main():
+        store.acquire()
+        waiter = asyncio.ensure_future(store.async_locked().__aenter__())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        store.release()
+        # the executor thread takes the lock after the cancellation
+        await asyncio.sleep(0.1)
+        assert store._fd is None
+        assert not store._thread_lock.locked()
+
+    asyncio.run(asyncio.wait_for(main(), 5))
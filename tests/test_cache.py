@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import httpx
+
+from freeletics import (
+    AsyncFreeleticsClient,
+    CachePolicy,
+    FreeleticsClient,
+    SQLiteCache,
+)
+from freeletics._cache import build_cache_key
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.headers.get("If-None-Match") == '"v1"':
+        return httpx.Response(304, headers={"ETag": '"v1"'})
+    return httpx.Response(200, headers={"ETag": '"v1"'}, json={"hello": "world"})
+
+
+def _send(session, cache, url):
+    request = session.build_request("GET", url)
+    entry = cache.prepare_request(request, namespace=1)
+    response = session.send(request)
+    return request, cache.process_response(response, entry, namespace=1)
+
+
+def test_sqlite_cache_revalidation(tmp_path):
+    filename = tmp_path / "cache.sqlite"
+    session = httpx.Client(transport=httpx.MockTransport(_handler))
+    url = "https://api.freeletics.com/v4/profile"
+
+    cache = SQLiteCache(filename)
+    request, response = _send(session, cache, url)
+    assert "If-None-Match" not in request.headers
+    assert response.json() == {"hello": "world"}
+    cache.close()
+
+    # a new cache instance simulates a process restart
+    cache = SQLiteCache(filename)
+    request, response = _send(session, cache, url)
+    assert request.headers["If-None-Match"] == '"v1"'
+    assert response.status_code == 200
+    assert response.json() == {"hello": "world"}
+    cache.close()
+
+
+def test_async_client_uses_cache(tmp_path, make_id_token):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("If-None-Match"))
+        return _handler(request)
+
+    async def main():
+        client = AsyncFreeleticsClient.from_credentials(
+            id_token=make_id_token(),
+            cache=SQLiteCache(tmp_path / "cache.sqlite"),
+            transport=httpx.MockTransport(handler),
+        )
+        for _ in range(2):
+            r = await client.get_coach_exercises()
+            assert r["hello"] == "world"
+        await client.close()
+
+    asyncio.run(main())
+    assert calls == [None, '"v1"']
+
+
+def test_async_close_awaits_revalidation(tmp_path, make_id_token):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match"):
+            await asyncio.sleep(10)
+        return _handler(request)
+
+    async def main():
+        client = AsyncFreeleticsClient.from_credentials(
+            id_token=make_id_token(),
+            cache=SQLiteCache(tmp_path / "cache.sqlite"),
+            cache_policies={
+                "/v5/coach/workouts": CachePolicy(max_age=0, stale_while_revalidate=60)
+            },
+            transport=httpx.MockTransport(handler),
+        )
+        await client.get_coach_workouts_god()
+        await client.get_coach_workouts_god()
+        await asyncio.sleep(0.05)
+        assert client._revalidating
+        await client.close()
+        # the cancelled revalidation has finished and released its key
+        assert not client._revalidation_tasks
+        assert not client._revalidating
+
+    asyncio.run(main())
+
+
+def test_cache_key_varies_on_namespace_and_headers():
+    request = httpx.Request("GET", "https://api.freeletics.com/v7/calendar")
+    other = httpx.Request(
+        "GET", "https://api.freeletics.com/v7/calendar", headers={"Payment-Token": "x"}
+    )
+    assert build_cache_key(request, 1) != build_cache_key(request, 2)
+    assert build_cache_key(request, 1) != build_cache_key(other, 1)
+
+
+def test_stale_while_revalidate(tmp_path, make_id_token):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("If-None-Match"))
+        return _handler(request)
+
+    policies = {
+        "/v5/coach/exercises": CachePolicy(max_age=60),
+        "/v5/coach/workouts": CachePolicy(max_age=0, stale_while_revalidate=60),
+    }
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        cache=SQLiteCache(tmp_path / "cache.sqlite"),
+        cache_policies=policies,
+        transport=httpx.MockTransport(handler),
+    )
+
+    # fresh responses are served without a request
+    client.get_coach_exercises()
+    assert client.get_coach_exercises()["hello"] == "world"
+    assert calls == [None]
+
+    # stale responses are served at once and revalidated in the background
+    client.get_coach_workouts_god()
+    assert client.get_coach_workouts_god()["hello"] == "world"
+    client.close()
+    assert calls == [None, None, '"v1"']
+
+
+def test_revalidation_replaces_entries_without_etag(tmp_path, make_id_token):
+    bodies = iter(["v1", "v2", "v3"])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"version": next(bodies)})
+
+    def make_client(policy):
+        return FreeleticsClient.from_credentials(
+            id_token=id_token,
+            cache=SQLiteCache(tmp_path / "cache.sqlite"),
+            cache_policies={"/v5/coach/workouts": policy},
+            transport=httpx.MockTransport(handler),
+        )
+
+    id_token = make_id_token()
+    client = make_client(CachePolicy(max_age=0.05, stale_while_revalidate=60))
+    assert client.get_coach_workouts_god()["version"] == "v1"
+    time.sleep(0.1)
+    # the stale entry is served and replaced in the background
+    assert client.get_coach_workouts_god()["version"] == "v1"
+    client.close()
+
+    client = make_client(CachePolicy(max_age=60))
+    assert client.get_coach_workouts_god()["version"] == "v2"
+    client.close()
+
+
+def test_concurrent_stale_hits_revalidate_once(tmp_path, make_id_token):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("If-None-Match"))
+        time.sleep(0.05)
+        return _handler(request)
+
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        cache=SQLiteCache(tmp_path / "cache.sqlite"),
+        cache_policies={
+            "/v5/coach/workouts": CachePolicy(max_age=0, stale_while_revalidate=60)
+        },
+        transport=httpx.MockTransport(handler),
+    )
+    client.get_coach_workouts_god()
+
+    barrier = threading.Barrier(8)
+
+    def fetch():
+        barrier.wait()
+        return client.get_coach_workouts_god()["hello"]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: fetch(), range(8)))
+    client.close()
+    assert results == ["world"] * 8
+    assert calls == [None, '"v1"']
+
+
+def test_calendar_range_caches_past_days(tmp_path, make_id_token):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        day = request.url.path.rsplit("/", 1)[-1]
+        calls.append(day)
+        return httpx.Response(200, json={"day": day})
+
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        cache=SQLiteCache(tmp_path / "cache.sqlite"),
+        transport=httpx.MockTransport(handler),
+    )
+    today = date.today()
+    start = today - timedelta(days=3)
+
+    # the payment token is renewed between the two ranges
+    for payment_token in (make_id_token(), make_id_token(7200)):
+        results = client.get_calendar_range(start, today, payment_token=payment_token)
+        results = list(results)
+        assert [r.key for r in results] == [
+            (start + timedelta(days=i)).isoformat() for i in range(4)
+        ]
+        assert all(r.ok for r in results)
+
+    # only today is requested again
+    assert len(calls) == 5
+    assert calls[-1] == today.isoformat()
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+from freeletics import AsyncFreeleticsClient, CoachCatalog, FreeleticsClient
+
+
+EXERCISES = {
+    "exercises": [
+        {"id": 1, "slug": "burpees", "title": "Burpees", "equipment": []},
+        {
+            "id": 2,
+            "slug": "pullups",
+            "title": "Pull-ups",
+            "equipment": ["pullup_bar"],
+            "body_regions": ["Upper_Body"],
+        },
+    ]
+}
+WORKOUTS = {
+    "workouts": [
+        {"id": 10, "slug": "aphrodite", "title": "Aphrodite", "duration": 1800},
+        {"id": 11, "slug": "dione", "title": "Dione", "duration": 900},
+    ]
+}
+
+
+def _catalog_transport(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        data = EXERCISES if request.url.path.endswith("exercises") else WORKOUTS
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json=data)
+
+    return httpx.MockTransport(handler)
+
+
+def test_coach_catalog(tmp_path, make_id_token):
+    calls = []
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(), transport=_catalog_transport(calls)
+    )
+    catalog = CoachCatalog()
+    assert catalog.update(client)
+    assert calls == [None] * 6
+    assert len(catalog) == 12
+    # unchanged catalogs are answered with 304 and not re-indexed
+    assert not catalog.update(client)
+    assert calls[6:] == ['"v1"'] * 6
+
+    assert catalog.get_exercise("pullups")["id"] == 2
+    assert catalog.get_exercise(1)["slug"] == "burpees"
+    assert catalog.get_workout("aphrodite")["duration"] == 1800
+    assert catalog.get_workout("burpees") is None
+
+    assert [i["id"] for i in catalog.search("pull ups")] == [2]
+    assert catalog.search(kind="exercise", body_regions="upper_body") == [
+        catalog.get_exercise(2)
+    ]
+    assert catalog.search("dione", duration=900)[0]["slug"] == "dione"
+    assert catalog.search("unknown") == []
+
+    filename = tmp_path / "catalog.json"
+    catalog.to_file(filename)
+    restored = CoachCatalog.from_file(filename)
+    assert restored.versions == catalog.versions
+    assert restored.get_workout(11)["slug"] == "dione"
+
+
+def test_coach_catalog_update_source_reindexes_one_source():
+    catalog = CoachCatalog()
+    catalog.update_source("exercises", "exercise", EXERCISES, '"v1"')
+    catalog.update_source("workouts_god", "workout", WORKOUTS, '"v1"')
+
+    changed = {"exercises": [{"id": 3, "slug": "situps", "title": "Sit-ups"}]}
+    assert catalog.update_source("exercises", "exercise", changed, '"v2"')
+    assert catalog.get_exercise("burpees") is None
+    assert [i["id"] for i in catalog.search("sit")] == [3]
+    assert [i["id"] for i in catalog.search("aphrodite")] == [10]
+    assert len(catalog) == 3
+
+
+def test_async_coach_catalog(make_id_token):
+    calls = []
+
+    async def run():
+        client = AsyncFreeleticsClient.from_credentials(
+            id_token=make_id_token(), transport=_catalog_transport(calls)
+        )
+        catalog = CoachCatalog()
+        assert await catalog.async_update(client)
+        assert not await catalog.async_update(client)
+        await client.close()
+        return catalog
+
+    catalog = asyncio.run(run())
+    assert calls == [None] * 6 + ['"v1"'] * 6
+    assert catalog.get_workout("dione")["id"] == 11
+
+
+def test_coach_catalog_update_raises_errors(make_id_token):
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        transport=httpx.MockTransport(lambda request: httpx.Response(404)),
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        CoachCatalog().update(client)
@@ -0,0 +1,58 @@
+import pytest
+
+from freeletics import (
+    _columnar,
+    activities_to_arrow,
+    activities_to_numpy,
+    read_activities_npz,
+    write_activities_npz,
+    write_activities_parquet,
+)
+
+
+np = pytest.importorskip("numpy")
+
+ACTIVITIES = [
+    {
+        "performed_activity": {
+            "id": 1,
+            "completed_at": "2023-01-02T10:00:00Z",
+            "duration": 600,
+            "points": 12.5,
+            "workout_slug": "aphrodite",
+            "blocks": [{}, {}, {}],
+            "is_personal_best": True,
+        }
+    },
+    {"performed_activity": {"id": 2, "workout_slug": "run-5km"}},
+]
+
+
+def test_activities_to_numpy(tmp_path):
+    array = activities_to_numpy(ACTIVITIES)
+    assert array["id"].tolist() == [1, 2]
+    assert array["rounds"].tolist() == [3, -1]
+    assert array["workout_slug"].tolist() == ["aphrodite", "run-5km"]
+    assert array["completed_at"][0] == np.datetime64("2023-01-02T10:00:00")
+    assert np.isnat(array["completed_at"][1])
+    assert np.isnan(array["points"][1])
+
+    filename = tmp_path / "activities.npz"
+    write_activities_npz(ACTIVITIES, filename)
+    loaded = read_activities_npz(filename)
+    assert loaded.dtype == array.dtype
+    assert loaded["id"].tolist() == array["id"].tolist()
+    assert loaded["workout_slug"].tolist() == array["workout_slug"].tolist()
+
+
+def test_activities_to_arrow():
+    pytest.importorskip("pyarrow")
+    table = activities_to_arrow(ACTIVITIES)
+    assert table.column("duration").to_pylist() == [600.0, None]
+    assert table.column("is_personal_best").to_pylist() == [True, None]
+
+
+def test_write_activities_parquet_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(_columnar, "pa", None)
+    with pytest.raises(Exception, match="pyarrow is required"):
+        write_activities_parquet(ACTIVITIES, tmp_path / "activities.parquet")
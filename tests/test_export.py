@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from freeletics import (
+    AsyncFreeleticsClient,
+    FreeleticsClient,
+    NDJSONWriter,
+    async_export_performed_activities,
+    export_performed_activities,
+    read_ndjson,
+)
+from freeletics._models import CoreResponseModel, RawResponse
+
+
+def test_ndjson_writer_roundtrip(tmp_path):
+    filename = tmp_path / "activities.jsonl.gz"
+    pretty = httpx.Response(200, content=b'{\n  "id": 1,\n  "text": "a\\nb"\n}')
+    lazy = CoreResponseModel(data=None, response=pretty, session=None)
+
+    with NDJSONWriter(filename, flush_every=1) as writer:
+        writer.write(lazy)
+        writer.write({"id": 2})
+        assert writer.count == 2
+
+    assert list(read_ndjson(filename)) == [{"id": 1, "text": "a\nb"}, {"id": 2}]
+
+
+def _export_handler(request: httpx.Request) -> httpx.Response:
+    path = request.url.path
+    if path == "/social/v1/users/1/activities":
+        page = int(request.url.params.get("page", 1))
+        data = [
+            {
+                "type": "training_completed",
+                "relationships": {
+                    "activity_object": {
+                        "data": {"type": "training", "id": page * 10 + i}
+                    }
+                },
+            }
+            for i in range(2)
+        ]
+        links = {"next": "page=2"} if page == 1 else {}
+        return httpx.Response(200, json={"data": data, "links": links})
+    activity_id = int(path.rsplit("/", 1)[-1])
+    if activity_id == 21:
+        return httpx.Response(200, content=b"")
+    body = b'{\n  "performed_activity": {"id": %d}\n}' % activity_id
+    return httpx.Response(200, content=body)
+
+
+def test_export_performed_activities(tmp_path, make_id_token):
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(), transport=httpx.MockTransport(_export_handler)
+    )
+    filename = tmp_path / "activities.jsonl"
+    # the empty body of activity 21 is skipped
+    assert export_performed_activities(client, filename, concurrency=2) == 3
+
+    lines = filename.read_bytes().splitlines()
+    assert len(lines) == 3
+    ids = sorted(json.loads(line)["performed_activity"]["id"] for line in lines)
+    assert ids == [10, 11, 20]
+
+
+def test_async_export_performed_activities(tmp_path, make_id_token):
+    async def export():
+        client = AsyncFreeleticsClient.from_credentials(
+            id_token=make_id_token(), transport=httpx.MockTransport(_export_handler)
+        )
+        try:
+            return await async_export_performed_activities(client, filename)
+        finally:
+            await client.close()
+
+    filename = tmp_path / "activities.jsonl.gz"
+    assert asyncio.run(export()) == 3
+    assert len(list(read_ndjson(filename))) == 3
+
+
+def test_ndjson_writer_rejects_records_without_body(tmp_path):
+    streamed = RawResponse(httpx.Response(200), size=10)
+    empty = RawResponse(httpx.Response(200), content=b"")
+    with NDJSONWriter(tmp_path / "activities.jsonl") as writer:
+        for item in (streamed, empty):
+            with pytest.raises(ValueError):
+                writer.write(item)
+        assert writer.count == 0
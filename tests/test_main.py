@@ -1,6 +1,39 @@
+import io
+
+import httpx
+
 import freeletics
 
 
 def test_placeholder():
     client = freeletics.FreeleticsClient()
     assert isinstance(client, freeletics.FreeleticsClient)
+
+
+def test_clients_own_their_session():
+    client = freeletics.FreeleticsClient()
+    other = freeletics.FreeleticsClient(limits=httpx.Limits(max_connections=2))
+    assert client.session is not other.session
+    assert client.session.auth is not other.session.auth
+
+
+def test_raw_responses(make_id_token):
+    body = b'{"performed_activity": {"id": 7}}'
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=body)
+
+    client = freeletics.FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        transport=httpx.MockTransport(handler),
+    )
+    raw = client.get_performed_activities_by_id(7, raw=True)
+    assert isinstance(raw, freeletics.RawResponse)
+    assert (raw.content, raw.etag, raw.status_code) == (body, '"v1"', 200)
+
+    buffer = io.BytesIO()
+    request = client.session.build_request("GET", "https://api.freeletics.com/x")
+    streamed = client.stream_raw(request, buffer, chunk_size=4)
+    assert buffer.getvalue() == body
+    assert streamed.content is None
+    assert streamed.size == len(body)
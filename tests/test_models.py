@@ -0,0 +1,53 @@
+import httpx
+import pytest
+
+from freeletics import get_json_backend, set_json_backend
+from freeletics._models import CoreResponseModel
+
+
+def test_response_model_decodes_lazily():
+    response = httpx.Response(200, headers={"ETag": '"1"'}, content=b'{"a": 1}')
+    model = CoreResponseModel(data=None, response=response, session=None)
+    assert model.etag == '"1"'
+    assert not model.is_decoded
+    assert model["a"] == 1
+    assert model.is_decoded
+
+
+def test_response_model_without_json_body():
+    response = httpx.Response(204)
+    model = CoreResponseModel(data=None, response=response, session=None)
+    assert model.as_dict() == {}
+
+
+def test_lean_response_model_revalidates():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"1"':
+            return httpx.Response(304, headers={"ETag": '"1"'})
+        return httpx.Response(200, headers={"ETag": '"1"'}, content=b'{"a": 1}')
+
+    session = httpx.Client(transport=httpx.MockTransport(handler))
+    request = session.build_request("GET", "https://api.freeletics.com/v4/profile")
+    model = CoreResponseModel(None, session.send(request), session, lean=True)
+    assert model.response.content == b""
+    assert model.as_dict() == {"a": 1}
+
+    model.update_from_request()
+    assert model.request.headers["If-None-Match"] == '"1"'
+    assert model.as_dict() == {"a": 1}
+    assert model.etag == '"1"'
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_json_backends(backend):
+    pytest.importorskip(backend)
+    previous = get_json_backend()
+    set_json_backend(backend)
+    try:
+        response = httpx.Response(200, content=b'{"a": [1, 2]}')
+        model = CoreResponseModel(data=None, response=response, session=None)
+        assert model.as_dict() == {"a": [1, 2]}
+        assert model.as_json() in ('{"a":[1,2]}', '{"a": [1, 2]}')
+        assert model.as_json(indent=2) == '{\n  "a": [\n    1,\n    2\n  ]\n}'
+    finally:
+        set_json_backend(previous)
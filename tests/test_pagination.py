@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+import freeletics
+
+
+PAGES = {
+    1: {
+        "data": [
+            {"id": 1, "type": "training_completed"},
+            {"id": 2, "type": "status_update"},
+        ],
+        "links": {"next": "page=2"},
+    },
+    2: {"data": [{"id": 3, "type": "training_completed"}], "links": {}},
+}
+
+
+def test_iter_user_activities():
+    client = freeletics.FreeleticsClient()
+    client.get_user_activities_by_id = lambda user_id, page: PAGES[page]
+
+    items = list(client.iter_user_activities(user_id=1))
+    assert [i["id"] for i in items] == [1, 2, 3]
+
+    items = client.iter_user_activities(user_id=1, activity_type="training_completed")
+    assert [i["id"] for i in items] == [1, 3]
+
+
+def test_async_iter_user_activities():
+    async def get_page(user_id, page):
+        return PAGES[page]
+
+    async def collect():
+        client = freeletics.AsyncFreeleticsClient()
+        client.get_user_activities_by_id = get_page
+        return [
+            i["id"]
+            async for i in client.iter_user_activities(
+                user_id=1, predicate=lambda i: i["id"] > 1
+            )
+        ]
+
+    assert asyncio.run(collect()) == [2, 3]
+
+
+def test_fetch_many_collects_errors():
+    def fetch(key):
+        if key == 2:
+            raise ValueError("boom")
+        return {"id": key}
+
+    client = freeletics.FreeleticsClient()
+    results = client.fetch_many(range(5), concurrency=2, ordered=True, fetch=fetch)
+    results = list(results)
+    assert [r.key for r in results] == [0, 1, 2, 3, 4]
+    assert [r.ok for r in results] == [True, True, False, True, True]
+    assert isinstance(results[2].error, ValueError)
+
+
+def test_async_fetch_many_bounded():
+    in_flight = 0
+    peak = 0
+
+    async def fetch(key):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * (5 - key))
+        in_flight -= 1
+        return {"id": key}
+
+    async def collect():
+        client = freeletics.AsyncFreeleticsClient()
+        return [r.key async for r in client.fetch_many(range(5), 2, fetch=fetch)]
+
+    assert sorted(asyncio.run(collect())) == [0, 1, 2, 3, 4]
+    assert peak <= 2
+
+
+def test_fetch_many_rejects_zero_concurrency():
+    async def collect(client):
+        return [r async for r in client.fetch_many(range(5), 0)]
+
+    with pytest.raises(ValueError, match="concurrency"):
+        list(freeletics.FreeleticsClient().fetch_many(range(5), 0))
+    with pytest.raises(ValueError, match="concurrency"):
+        asyncio.run(collect(freeletics.AsyncFreeleticsClient()))
+
+
+def test_iter_user_activities_with_identity_map():
+    def page(activity_id, next_page):
+        return {
+            "data": [
+                {
+                    "id": activity_id,
+                    "type": "training_completed",
+                    "relationships": {
+                        "user": {"data": {"type": "user", "id": 7}},
+                        "activity_object": {"data": {"type": "training", "id": "9"}},
+                    },
+                }
+            ],
+            "included": [
+                {"id": "7", "type": "user", "attributes": {"first_name": "A"}}
+            ],
+            "links": {"next": next_page} if next_page else {},
+        }
+
+    pages = {1: page(1, "page=2"), 2: page(2, None)}
+    client = freeletics.FreeleticsClient()
+    client.get_user_activities_by_id = lambda user_id, p: pages[p]
+
+    identity_map = freeletics.IdentityMap()
+    first, second = client.iter_user_activities(user_id=1, identity_map=identity_map)
+    assert first.related("user") is second.related("user")
+    assert first.related("user")["first_name"] == "A"
+    assert identity_map.get("training", 9) is second.related("activity_object")
+    assert len(identity_map) == 4
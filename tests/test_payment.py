@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+
+from freeletics import AsyncFreeleticsClient, FreeleticsClient, SQLiteCache
+
+
+def _payment_token(expires_in=3600):
+    payload = {
+        "aud": ["payment_token"],
+        "payment": {"user_id": 1, "claims": []},
+        "exp": time.time() + expires_in,
+    }
+    return jwt.encode(payload, "secret" * 8, algorithm="HS256")
+
+
+def _transport(calls, expires_in=3600):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/payment/v3/claims":
+            token = _payment_token(expires_in)
+            return httpx.Response(200, json={"data": {"token": token}})
+        return httpx.Response(200, json={"token": request.headers["Payment-Token"]})
+
+    return httpx.MockTransport(handler)
+
+
+def test_payment_token_is_cached(make_id_token):
+    calls = []
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(), transport=_transport(calls)
+    )
+    first = client.get_calendar()
+    second = client.get_calendar_by_date("2023-01-01")
+    assert first["token"] == second["token"] == client.payment_tokens.token.token
+    assert calls.count("/payment/v3/claims") == 1
+
+
+def test_payment_token_is_renewed_before_expiry(make_id_token):
+    calls = []
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(), transport=_transport(calls, expires_in=60)
+    )
+    client.get_calendar()
+    client.get_calendar()
+    assert calls.count("/payment/v3/claims") == 2
+
+
+def test_async_payment_token_is_shared(make_id_token):
+    calls = []
+
+    async def run():
+        client = AsyncFreeleticsClient.from_credentials(
+            id_token=make_id_token(), transport=_transport(calls)
+        )
+        await asyncio.gather(*[client.get_calendar() for _ in range(3)])
+        await client.close()
+
+    asyncio.run(run())
+    assert calls.count("/payment/v3/claims") == 1
+
+
+def test_cached_past_day_needs_no_payment_token(tmp_path, make_id_token):
+    calls = []
+    id_token = make_id_token()
+    # a short-lived token is renewed on every use
+    client = FreeleticsClient.from_credentials(
+        id_token=id_token,
+        cache=SQLiteCache(tmp_path / "cache.sqlite"),
+        transport=_transport(calls, expires_in=60),
+    )
+    first = client.get_calendar_by_date("2023-01-01")
+    second = client.get_calendar_by_date("2023-01-01")
+    assert first["token"] == second["token"]
+    assert calls == ["/payment/v3/claims", "/v7/calendar/days/2023-01-01"]
+
+    async def run():
+        client = AsyncFreeleticsClient.from_credentials(
+            id_token=id_token,
+            cache=SQLiteCache(tmp_path / "cache.sqlite"),
+            transport=_transport(calls, expires_in=60),
+        )
+        r = await client.get_calendar_by_date("2023-01-01")
+        await client.close()
+        return r["token"]
+
+    assert asyncio.run(run()) == first["token"]
+    assert len(calls) == 2
+
+
+def test_missing_payment_token(make_id_token):
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})),
+    )
+    with pytest.raises(Exception, match="No payment token"):
+        client.get_calendar()
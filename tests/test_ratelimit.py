@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+
+from freeletics import AdaptiveRateLimiter, FreeleticsClient, RetryPolicy
+from freeletics._ratelimit import parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("invalid") is None
+
+
+def test_limiter_adapts_to_throttling():
+    limiter = AdaptiveRateLimiter(initial_concurrency=8, max_concurrency=10)
+    for _ in range(8):
+        limiter.acquire()
+    assert limiter.in_flight == 8
+
+    limiter.release(429, "1")
+    assert limiter.limit == 4
+    # a second throttled response from the same burst does not shrink again
+    limiter.release(429, "1")
+    assert limiter.limit == 4
+
+    for _ in range(6):
+        limiter.release(200)
+    assert limiter.in_flight == 0
+    assert 4 < limiter.limit <= 10
+
+
+def test_async_limiter_bounds_concurrency():
+    limiter = AdaptiveRateLimiter(initial_concurrency=2, max_concurrency=2)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        await limiter.async_acquire()
+        peak = max(peak, limiter.in_flight)
+        await asyncio.sleep(0.001)
+        limiter.release(200)
+
+    async def main():
+        await asyncio.gather(*(job() for _ in range(10)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+
+def test_client_retries_throttled_requests(make_id_token):
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"ok": True}),
+    ]
+
+    limiter = AdaptiveRateLimiter()
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        rate_limiter=limiter,
+        transport=httpx.MockTransport(lambda request: responses.pop(0)),
+    )
+
+    r = client.request("GET", "/v4/profile")
+    assert r["ok"] is True
+    assert responses == []
+    assert limiter.in_flight == 0
+
+
+def test_limiter_does_not_retry_503(make_id_token):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    limiter = AdaptiveRateLimiter(default_retry_after=0)
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        rate_limiter=limiter,
+        transport=httpx.MockTransport(handler),
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.request("GET", "/v4/profile")
+    # 5xx retries are owned by a RetryPolicy, the limiter only shrinks
+    assert len(calls) == 1
+    assert limiter.limit == 2
+
+
+def test_retry_policy_owns_5xx_retries(make_id_token):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    policy = RetryPolicy(max_retries=3, backoff_factor=0)
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        rate_limiter=AdaptiveRateLimiter(default_retry_after=0),
+        retry_policy=policy,
+        transport=httpx.MockTransport(handler),
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.request("GET", "/v4/profile")
+    assert len(calls) == 4
+    assert policy.stats.retries == 3
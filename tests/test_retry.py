@@ -0,0 +1,57 @@
+import httpx
+import pytest
+
+from freeletics import FreeleticsClient, RetryPolicy
+
+
+def _flaky_send(failures):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) <= failures:
+            raise httpx.ConnectError("connection reset", request=request)
+        return httpx.Response(200, json={"ok": True}, request=request)
+
+    return httpx.MockTransport(handler), calls
+
+
+def test_retry_idempotent_request(make_id_token):
+    policy = RetryPolicy(max_retries=3, backoff_factor=0)
+    transport, calls = _flaky_send(failures=2)
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(), retry_policy=policy, transport=transport
+    )
+
+    assert client.request("GET", "/v4/profile")["ok"] is True
+    assert len(calls) == 3
+    assert policy.stats.as_dict() == {
+        "requests": 1,
+        "retries": 2,
+        "gave_up": 0,
+        "budget_exhausted": 0,
+    }
+
+
+def test_no_retry_for_post_and_exhausted_budget(make_id_token):
+    policy = RetryPolicy(max_retries=3, backoff_factor=0, budget_ratio=0, min_retries=1)
+    transport, calls = _flaky_send(failures=10)
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(), retry_policy=policy, transport=transport
+    )
+
+    with pytest.raises(httpx.ConnectError):
+        client.request("POST", "/v2/users/search")
+    assert len(calls) == 1
+
+    with pytest.raises(httpx.ConnectError):
+        client.request("GET", "/v4/profile")
+    assert len(calls) == 3
+    assert policy.stats.budget_exhausted == 1
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.get_backoff(i) for i in range(5)] == [1, 2, 4, 5, 5]
+    response = httpx.Response(503, headers={"Retry-After": "3"})
+    assert policy.get_backoff(0, response) == 3
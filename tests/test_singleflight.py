@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from freeletics import AsyncFreeleticsClient, FreeleticsClient
+from freeletics._singleflight import AsyncSingleFlight
+
+
+def test_async_client_coalesces_identical_gets(make_id_token):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"path": request.url.path})
+
+    async def run():
+        client = AsyncFreeleticsClient.from_credentials(
+            id_token=make_id_token(),
+            coalesce_requests=True,
+            transport=httpx.MockTransport(handler),
+        )
+        results = await asyncio.gather(
+            *[client.request("GET", "/v4/profile") for _ in range(5)],
+            client.request("GET", "/v4/settings"),
+        )
+        await client.close()
+        return results
+
+    results = asyncio.run(run())
+    assert sorted(calls) == ["/v4/profile", "/v4/settings"]
+    assert [r["path"] for r in results] == ["/v4/profile"] * 5 + ["/v4/settings"]
+
+
+def test_sync_client_coalesces_identical_gets(make_id_token):
+    calls = []
+    release = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        release.wait(1)
+        return httpx.Response(500)
+
+    client = FreeleticsClient.from_credentials(
+        id_token=make_id_token(),
+        coalesce_requests=True,
+        transport=httpx.MockTransport(handler),
+    )
+    errors = []
+
+    def call():
+        try:
+            client.request("GET", "/v4/profile")
+        except httpx.HTTPStatusError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    # give all threads the time to join the in-flight request
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert calls == ["/v4/profile"]
+    assert client._single_flight.in_flight == 0
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        single_flight = AsyncSingleFlight()
+        leader = asyncio.ensure_future(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == "result"
+        assert leader.cancelled()
+        assert single_flight.in_flight == 0
+
+    asyncio.run(main())
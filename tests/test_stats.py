@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+
+from freeletics import (
+    activities_to_numpy,
+    completion_streaks,
+    personal_bests,
+    rolling_average,
+    time_per_round_trend,
+    weekly_volume,
+)
+
+
+np = pytest.importorskip("numpy")
+
+
+def _activity(user_id, slug, completed_at, duration, rounds=3):
+    return {
+        "id": 1,
+        "user_id": user_id,
+        "workout_slug": slug,
+        "completed_at": completed_at,
+        "duration": duration,
+        "rounds": rounds,
+    }
+
+
+ARRAY = activities_to_numpy(
+    [
+        _activity(1, "aphrodite", "2023-01-02T10:00:00Z", 900),  # monday
+        _activity(1, "aphrodite", "2023-01-03T10:00:00Z", 840),
+        _activity(1, "aphrodite", "2023-01-04T10:00:00Z", 810),
+        _activity(1, "run", "2023-01-10T10:00:00Z", 1500),
+        _activity(2, "aphrodite", "2023-01-05T10:00:00Z", 700),
+    ]
+)
+
+
+def test_personal_bests_per_user():
+    bests = personal_bests(ARRAY, by=("user_id", "workout_slug"))
+    assert bests["workout_slug"].tolist() == ["aphrodite", "run", "aphrodite"]
+    assert bests["best"].tolist() == [810, 1500, 700]
+    assert bests["index"].tolist() == [2, 3, 4]
+    assert bests["count"].tolist() == [3, 1, 1]
+
+
+def test_personal_bests_of_no_activities():
+    empty = ARRAY[:0]
+    assert len(personal_bests(empty)) == 0
+    assert len(personal_bests(empty, by=())) == 0
+
+
+def test_weekly_volume():
+    volume = weekly_volume(ARRAY)
+    assert volume["week"].tolist() == [date(2023, 1, 2), date(2023, 1, 9)]
+    assert volume["total"].tolist() == [3250, 1500]
+    assert volume["count"].tolist() == [4, 1]
+
+
+def test_rolling_average():
+    result = rolling_average(np.array([1.0, 3.0, np.nan, 5.0]), window=2)
+    assert result.tolist() == [1.0, 2.0, 3.0, 5.0]
+
+    with pytest.raises(Exception, match="window"):
+        rolling_average(np.array([1.0]), window=0)
+
+
+def test_completion_streaks():
+    streaks = completion_streaks(ARRAY, by=("user_id",), today=date(2023, 1, 5))
+    assert streaks["longest"].tolist() == [3, 1]
+    assert streaks["current"].tolist() == [3, 1]
+
+
+def test_time_per_round_trend():
+    trend = time_per_round_trend(ARRAY, by=("user_id", "workout_slug"))
+    assert trend["slope"][0] == pytest.approx(-15)
+    assert np.isnan(trend["slope"][1])
+    assert trend["count"].tolist() == [3, 1, 1]
@@ -0,0 +1,41 @@
+from freeletics import ActivityStore
+
+
+def _activity(activity_id, slug, completed_at, duration):
+    return {
+        "performed_activity": {
+            "id": activity_id,
+            "user_id": 1,
+            "workout_slug": slug,
+            "completed_at": completed_at,
+            "duration": duration,
+        }
+    }
+
+
+def test_query_activities(tmp_path):
+    filename = tmp_path / "store.sqlite"
+    with ActivityStore(filename) as store:
+        store.add_activities(
+            [
+                _activity(1, "aphrodite", "2025-03-01T10:00:00Z", 1500),
+                _activity(2, "aphrodite", "2024-12-31T10:00:00Z", 1600),
+                _activity(3, "dione", "2025-02-01T10:00:00Z", 900),
+                _activity(4, "aphrodite", "2025-01-10T10:00:00Z", 1400),
+            ]
+        )
+        store.add_calendar_day("2025-03-01", {"calendar_day": {"x": 1}}, user_id=1)
+
+    with ActivityStore(filename) as store:
+        result = store.query_activities(
+            workout_slug="aphrodite", start="2025-01-01", end="2026-01-01"
+        )
+        assert [a["performed_activity"]["id"] for a in result] == [4, 1]
+
+        fastest = store.query_activities(workout_slug="aphrodite", order_by="duration")
+        assert fastest[0]["performed_activity"]["id"] == 4
+        assert store.get_activity("3")["performed_activity"]["workout_slug"] == "dione"
+        assert store.get_calendar_day("2025-03-01", user_id=1) == {
+            "calendar_day": {"x": 1}
+        }
+        assert store.count_activities() == 4
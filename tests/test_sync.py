@@ -0,0 +1,102 @@
+import freeletics
+from freeletics._models import FetchResult
+
+
+def _feed_item(activity_id, completed_at):
+    return {
+        "type": "training_completed",
+        "attributes": {"created_at": completed_at},
+        "relationships": {
+            "activity_object": {"data": {"id": activity_id, "type": "training"}}
+        },
+    }
+
+
+class FakeClient:
+    def __init__(self, feed):
+        self.feed = feed
+        self.fetched = []
+        self.consumed = 0
+
+    def iter_user_activities(self, user_id=None, activity_type=None):
+        for item in self.feed:
+            self.consumed += 1
+            yield item
+
+    def fetch_many(self, ids, concurrency=10, ordered=False):
+        for i in ids:
+            self.fetched.append(i)
+            yield FetchResult(i, response={"id": i})
+
+
+def test_activity_sync_stops_at_known_activities(tmp_path):
+    feed = [
+        _feed_item(3, "2023-01-03T00:00:00Z"),
+        _feed_item(2, "2023-01-02T00:00:00Z"),
+        _feed_item(1, "2023-01-01T00:00:00Z"),
+    ]
+    state = freeletics.SyncState()
+    state.add("2", "2023-01-02T00:00:00Z")
+
+    client = FakeClient(feed)
+    synced = list(freeletics.ActivitySync(client, state).run())
+    assert synced == [{"id": "3"}]
+    assert client.consumed == 2
+    assert state.high_water_mark == "2023-01-03T00:00:00Z"
+
+    filename = tmp_path / "state.json"
+    state.to_file(filename)
+    state = freeletics.SyncState.from_file(filename)
+    assert state.is_known(3)
+    assert not state.is_known(1)
+
+
+def test_interrupted_sync_resumes_with_missed_activities(tmp_path):
+    feed = [
+        _feed_item(4, "2023-01-04T00:00:00Z"),
+        _feed_item(3, "2023-01-03T00:00:00Z"),
+        # uploaded late, older than the newest known activity
+        _feed_item(2, "2022-12-31T00:00:00Z"),
+        _feed_item(1, "2023-01-01T00:00:00Z"),
+    ]
+    state = freeletics.SyncState()
+    state.add("1", "2023-01-01T00:00:00Z")
+    filename = tmp_path / "state.json"
+
+    run = freeletics.ActivitySync(FakeClient(feed), state).run()
+    try:
+        assert next(run) == {"id": "4"}
+    finally:
+        run.close()
+        state.to_file(filename)
+
+    state = freeletics.SyncState.from_file(filename)
+    assert sorted(state.pending) == ["2", "3"]
+    synced = list(freeletics.ActivitySync(FakeClient(feed), state).run())
+    assert sorted(s["id"] for s in synced) == ["2", "3"]
+    assert state.pending == {}
+    assert all(state.is_known(i) for i in range(1, 5))
+
+
+def test_sync_state_keeps_aggregates_up_to_date(tmp_path):
+    state = freeletics.SyncState(aggregates=freeletics.ActivityAggregates())
+    client = FakeClient([_feed_item(1, "2023-01-03T00:00:00Z")])
+    client.fetch_many = lambda ids, concurrency, ordered: (
+        FetchResult(
+            i,
+            response={
+                "workout_slug": "aphrodite",
+                "completed_at": "2023-01-03T00:00:00Z",
+                "duration": 600,
+            },
+        )
+        for i in ids
+    )
+    list(freeletics.ActivitySync(client, state).run())
+
+    filename = tmp_path / "state.json"
+    state.to_file(filename)
+    aggregates = freeletics.SyncState.from_file(filename).aggregates
+    assert aggregates.total["count"] == 1
+    assert aggregates.week("2023-01-05")["duration"] == 600
+    assert aggregates.workout("aphrodite")["best_duration"] == 600
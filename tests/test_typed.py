@@ -0,0 +1,46 @@
+import httpx
+import pytest
+
+from freeletics import PerformedActivity, UserProfile
+from freeletics._models import CoreResponseModel
+
+
+def test_typed_model_roundtrip():
+    payload = {"id": 1, "workout_slug": "aphrodite", "duration": 1500, "foo": "bar"}
+    activity = PerformedActivity.from_dict({"performed_activity": payload})
+    assert activity.id == 1
+    assert activity.duration == 1500
+    assert activity.points is None
+    assert activity.extra == {"foo": "bar"}
+    assert activity.as_dict() == payload
+    assert PerformedActivity.from_json(activity.as_json()) == activity
+    assert not hasattr(activity, "__dict__")
+
+    with pytest.raises(AttributeError):
+        activity.unknown = 1
+
+
+def test_typed_model_keeps_null_fields_and_wrapper():
+    data = {
+        "performed_activity": {"id": 1, "points": None, "foo": None},
+        "meta": {"version": 2},
+    }
+    activity = PerformedActivity.from_dict(data)
+    assert activity.points is None
+    assert activity.duration is None
+    assert activity.wrapper == {"meta": {"version": 2}}
+    assert activity.as_dict() == {"id": 1, "points": None, "foo": None}
+    assert activity.as_dict(wrapped=True) == data
+    assert PerformedActivity.from_json(activity.as_json(wrapped=True)) == activity
+
+    activity.duration = 600
+    assert activity.as_dict()["duration"] == 600
+    assert repr(activity) == "PerformedActivity(id=1, duration=600, points=None)"
+
+
+def test_response_model_as_typed_model():
+    response = httpx.Response(200, content=b'{"user": {"id": 3, "first_name": "A"}}')
+    model = CoreResponseModel(data=None, response=response, session=None)
+    profile = model.as_model(UserProfile)
+    assert (profile.id, profile.first_name) == (3, "A")
+    assert not model.is_decoded